@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+
+"""
+backtest.py
+
+Thin entry point for `python backtest.py`; the backtest itself lives in
+pairsplus/backtest.py.
+"""
+
+from pairsplus.backtest import main
+
+if __name__ == "__main__":
+    main()
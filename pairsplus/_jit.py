@@ -0,0 +1,17 @@
+"""
+pairsplus/_jit.py
+
+Optional Numba support. When numba isn't installed the kernels
+decorated with `njit` simply run as plain Python.
+"""
+
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -8,57 +8,132 @@ using historical bar data and the chosen hyperparameters.
 """
 
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from joblib import Memory
+
 from pairsplus import data_io, pairs, signals, portfolio
-from pairsplus.tune_config import DEFAULT_HYPERPARAMS
+from pairsplus.tune_config import DEFAULT_HYPERPARAMS, HP
 from pairsplus.hyperparams import load_best_hyperparameters
-from pairsplus.config import UNIVERSE
+from pairsplus.config import UNIVERSE, DATA_DIR
+
+# Bars and cointegrated pairs don't depend on the tuned signal parameters,
+# so cache them on disk and let repeated tuning trials reuse them.
+memory = Memory(DATA_DIR / "cache", verbose=0)
+
+
+@memory.cache
+def _fetch_bars_cached(tickers, interval, lookback_days, as_of):
+    """
+    Cached data_io.fetch_bars. ``as_of`` is only part of the cache key so
+    the bars are refreshed once per day.
+    """
+    return data_io.fetch_bars(tickers=tickers, interval=interval, lookback=lookback_days)
+
+
+_find_cointegrated_cached = memory.cache(pairs.find_cointegrated)
+
+
+def _score_pair(a_prices, b_prices, a, b, z_threshold, rolling_window, kalman_cov) -> float:
+    """
+    Score a single pair from its two price arrays.
+
+    Runs inside a worker process, so it must stay a picklable top-level function.
+    """
+    sig = signals.signal_from_spread(
+        a_prices, b_prices,
+        a, b,
+        z_threshold=z_threshold,
+        rolling_window=rolling_window,
+        kalman_cov=kalman_cov
+    )
+    if not sig:
+        return 0.0
+    return float(portfolio.sim_backtest(a_prices, b_prices, sig))
+
+
+def _score_shared_pair(shm_name, shape, i_a, i_b, a, b, z_threshold, rolling_window, kalman_cov) -> float:
+    """
+    `_score_pair` for columns `i_a`/`i_b` of the price matrix that
+    `run_backtest` placed in shared memory, so no prices are pickled.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        prices = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order="F")
+        score = _score_pair(
+            prices[:, i_a], prices[:, i_b],
+            a, b,
+            z_threshold, rolling_window, kalman_cov
+        )
+        # Views into the segment must be gone before it can be closed.
+        del prices
+        return score
+    finally:
+        shm.close()
+
 
 def run_backtest(
-    z_threshold: float = None,
-    lookback_days: int = None,
-    rolling_window: int = None,
-    kalman_cov: float = None,
+    hp: HP = None,
     universe: list[str] = None,
     interval: str = "1h"
 ) -> float:
     """
-    Run a single backtest with specified or default hyperparameters.
+    Run a single backtest with the given (or default) hyperparameters.
     """
-    z_threshold = z_threshold or DEFAULT_HYPERPARAMS["z_threshold"]
-    lookback_days = lookback_days or DEFAULT_HYPERPARAMS["lookback_days"]
-    rolling_window = rolling_window or DEFAULT_HYPERPARAMS["rolling_window"]
-    kalman_cov = kalman_cov or DEFAULT_HYPERPARAMS["kalman_cov"]
+    hp = hp if hp is not None else HP(**DEFAULT_HYPERPARAMS)
     universe = universe or UNIVERSE
 
     print("\n📈 Running backtest with hyperparameters:")
-    print(f"   - z_threshold: {z_threshold}")
-    print(f"   - lookback_days: {lookback_days}")
-    print(f"   - rolling_window: {rolling_window}")
-    print(f"   - kalman_cov: {kalman_cov}")
+    print(f"   - z_threshold: {hp.z_threshold}")
+    print(f"   - lookback_days: {hp.lookback_days}")
+    print(f"   - rolling_window: {hp.rolling_window}")
+    print(f"   - kalman_cov: {hp.kalman_cov}")
     print(f"   - universe: {universe}")
     print(f"   - interval: {interval}\n")
 
     try:
-        df = data_io.fetch_bars(tickers=universe, interval=interval, lookback=lookback_days)
+        df = _fetch_bars_cached(list(universe), interval, hp.lookback_days, date.today())
     except Exception as e:
         print(f"❌ Error fetching bars: {e}")
         return 0.0
 
-    best_pairs = pairs.find_cointegrated(df)
+    best_pairs = _find_cointegrated_cached(df)
     total_pnl = 0.0
-
-    for _, row in best_pairs.iterrows():
-        a, b = row["a"], row["b"]
-        sig = signals.signal_from_spread(
-            df[[a, b]],
-            a, b,
-            z_threshold=z_threshold,
-            rolling_window=rolling_window,
-            kalman_cov=kalman_cov
-        )
-        if sig:
-            pnl = portfolio.sim_backtest(df[[a, b]], sig)
-            total_pnl += pnl
+    if best_pairs.empty:
+        return total_pnl
+
+    # Pairs are independent, so score them in parallel. The prices sit in
+    # shared memory (column-major, so each column is contiguous) and every
+    # task only carries the segment name and its two column indices.
+    values = df.to_numpy(dtype=np.float64)
+    col_idx = {col: i for i, col in enumerate(df.columns)}
+    shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        prices = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf, order="F")
+        prices[:] = values
+        del prices
+
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = []
+            for a, b in best_pairs[["a", "b"]].itertuples(index=False, name=None):
+                futures.append(executor.submit(
+                    _score_shared_pair,
+                    shm.name, values.shape,
+                    col_idx[a], col_idx[b],
+                    a, b,
+                    hp.z_threshold,
+                    hp.rolling_window,
+                    hp.kalman_cov
+                ))
+            for future in as_completed(futures):
+                total_pnl += future.result()
+    finally:
+        shm.close()
+        shm.unlink()
 
     return total_pnl
 
@@ -86,17 +161,14 @@ def main():
             print("⚠️ best_hyperparams.json not found. Falling back to defaults.")
             best_params = {}
 
-    z_threshold = args.z_threshold or best_params.get("z_threshold")
-    lookback_days = args.lookback_days or best_params.get("lookback_days")
-    rolling_window = args.rolling_window or best_params.get("rolling_window")
-    kalman_cov = args.kalman_cov or best_params.get("kalman_cov")
+    # Explicit CLI values win over best_hyperparams.json, which wins over defaults.
+    cli_overrides = {
+        k: v for k, v in vars(args).items()
+        if k in DEFAULT_HYPERPARAMS and v is not None
+    }
+    hp = HP(**{**DEFAULT_HYPERPARAMS, **best_params, **cli_overrides})
 
-    score = run_backtest(
-        z_threshold=z_threshold,
-        lookback_days=lookback_days,
-        rolling_window=rolling_window,
-        kalman_cov=kalman_cov,
-    )
+    score = run_backtest(hp)
 
     print("\n" + "=" * 50)
     print(f"✅ Backtest completed. PnL: {score:.2f}")
@@ -1,13 +1,25 @@
 # pairsplus/cluster.py
 
 import numpy as np
-from sklearn.cluster import KMeans
+import pandas as pd
+from sklearn.cluster import AgglomerativeClustering
+
+def _log_returns(price_df):
+    """
+    Log returns as a plain (T-1, N) ndarray, dropping rows with missing data.
+    Also returns the mask of kept rows, aligned with price_df.index[1:].
+    """
+    logp = np.log(price_df.to_numpy(dtype=np.float64, copy=False))
+    returns = np.diff(logp, axis=0)
+    keep = ~np.isnan(returns).any(axis=1)
+    return returns[keep], keep
 
 def compute_returns(price_df):
     """
     Compute log returns from prices.
     """
-    return np.log(price_df / price_df.shift(1)).dropna()
+    returns, keep = _log_returns(price_df)
+    return pd.DataFrame(returns, index=price_df.index[1:][keep], columns=price_df.columns)
 
 def cluster_tickers(price_df, n_clusters=3):
     """
@@ -15,23 +27,22 @@ def cluster_tickers(price_df, n_clusters=3):
     
     Returns a dictionary of cluster assignments.
     """
-    # 1. Compute returns
-    returns = compute_returns(price_df)
+    # 1. Compute returns (ndarray; only the correlation matrix is needed)
+    returns, _ = _log_returns(price_df)
 
-    # 2. Correlation matrix
-    corr_matrix = returns.corr()
+    # 2. Correlation matrix (float32 is plenty for clustering and halves memory traffic)
+    corr_matrix = np.corrcoef(returns, rowvar=False, dtype=np.float32)
 
     # 3. Convert correlation to distance
-    distance_matrix = 1 - corr_matrix
-
-    # 4. Flatten upper triangle for KMeans
-    features = distance_matrix.values
+    distance_matrix = 1.0 - corr_matrix
 
-    # 5. Fit KMeans
-    model = KMeans(n_clusters=n_clusters, random_state=42)
-    model.fit(features)
+    # 4. Cluster directly on the precomputed distances
+    model = AgglomerativeClustering(
+        n_clusters=n_clusters, metric="precomputed", linkage="average"
+    )
+    model.fit(distance_matrix)
 
-    # 6. Assign clusters
+    # 5. Assign clusters
     labels = model.labels_
     assignments = dict(zip(price_df.columns, labels))
 
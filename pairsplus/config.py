@@ -4,16 +4,22 @@ pairsplus/config.py
 Loads and validates environment variables for the trading bot.
 """
 
+from functools import lru_cache
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Load .env
-load_dotenv(BASE_DIR / ".env")
+# Settings are read on first use rather than at import, so backtest-only
+# workflows (and worker processes) don't need the live-trading secrets.
+
+@lru_cache(maxsize=None)
+def _load_env_once() -> None:
+    load_dotenv(BASE_DIR / ".env")
 
 def get_env_var(name: str) -> str:
+    _load_env_once()
     value = os.getenv(name)
     if value is None or value.strip() == "":
         raise EnvironmentError(
@@ -26,35 +32,74 @@ def parse_bool(val: str) -> bool:
     return str(val).strip().lower() in ("true", "1", "yes", "y")
 
 # --- Mode Setting ---
-LIVE_MODE = os.getenv("LIVE_MODE", "websocket").strip().lower()
-if LIVE_MODE not in ["websocket", "polling"]:
-    raise ValueError(
-        f"⚠️ Invalid LIVE_MODE: {LIVE_MODE}. Must be 'websocket' or 'polling'. Check your .env."
-    )
+@lru_cache(maxsize=None)
+def live_mode() -> str:
+    _load_env_once()
+    mode = os.getenv("LIVE_MODE", "websocket").strip().lower()
+    if mode not in ["websocket", "polling"]:
+        raise ValueError(
+            f"⚠️ Invalid LIVE_MODE: {mode}. Must be 'websocket' or 'polling'. Check your .env."
+        )
+    return mode
+
 # --- Required Secrets ---
-ALPACA_KEY = get_env_var("ALPACA_KEY")
-ALPACA_SECRET = get_env_var("ALPACA_SECRET")
-DISCORD_WEBHOOK_URL = get_env_var("DISCORD_WEBHOOK_URL")
+@lru_cache(maxsize=None)
+def alpaca_key() -> str:
+    return get_env_var("ALPACA_KEY")
+
+@lru_cache(maxsize=None)
+def alpaca_secret() -> str:
+    return get_env_var("ALPACA_SECRET")
+
+# --- Optional Notifications ---
+@lru_cache(maxsize=None)
+def discord_webhook_url() -> str:
+    """Webhook URL, or "" when unset so the notifier skips sending."""
+    _load_env_once()
+    return (os.getenv("DISCORD_WEBHOOK_URL") or "").strip()
 
 # --- Execution Config ---
-ORDER_TYPE = get_env_var("ORDER_TYPE").upper()
-PEG_DISTANCE = float(get_env_var("PEG_DISTANCE"))
-SPLIT_NOTIONAL = parse_bool(get_env_var("SPLIT_NOTIONAL"))
+@lru_cache(maxsize=None)
+def order_type() -> str:
+    return get_env_var("ORDER_TYPE").upper()
+
+@lru_cache(maxsize=None)
+def peg_distance() -> float:
+    return float(get_env_var("PEG_DISTANCE"))
+
+@lru_cache(maxsize=None)
+def split_notional() -> bool:
+    return parse_bool(get_env_var("SPLIT_NOTIONAL"))
 
 # --- Strategy / Signal Parameters ---
-LOOKBACK_DAYS = int(get_env_var("LOOKBACK_DAYS"))
-ROLLING_WINDOW = int(get_env_var("ROLLING_WINDOW"))
-Z_THRESHOLD = float(get_env_var("Z_THRESHOLD"))
-KALMAN_COV = float(get_env_var("KALMAN_COV"))
+@lru_cache(maxsize=None)
+def lookback_days() -> int:
+    return int(get_env_var("LOOKBACK_DAYS"))
+
+@lru_cache(maxsize=None)
+def rolling_window() -> int:
+    return int(get_env_var("ROLLING_WINDOW"))
+
+@lru_cache(maxsize=None)
+def z_threshold() -> float:
+    return float(get_env_var("Z_THRESHOLD"))
+
+@lru_cache(maxsize=None)
+def kalman_cov() -> float:
+    return float(get_env_var("KALMAN_COV"))
 
 # --- Infra / Monitoring ---
-METRICS_PORT = int(get_env_var("METRICS_PORT"))
-POLLING_INTERVAL_MINUTES = int(get_env_var("POLLING_INTERVAL_MINUTES"))
+@lru_cache(maxsize=None)
+def metrics_port() -> int:
+    return int(get_env_var("METRICS_PORT"))
+
+@lru_cache(maxsize=None)
+def polling_interval_minutes() -> int:
+    return int(get_env_var("POLLING_INTERVAL_MINUTES"))
 
 # --- Static ---
 BASE_URL = "https://paper-api.alpaca.markets"
 DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
 
 UNIVERSE = [
     "AAPL", "MSFT", "AMZN", "GOOGL", "META",
@@ -5,38 +5,112 @@ Handles fetching historical bar data for tickers,
 with optional local caching.
 """
 
-import yfinance as yf
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import httpx
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 
-from .config import DATA_DIR, LOOKBACK_DAYS, UNIVERSE
+from .config import DATA_DIR, UNIVERSE, lookback_days
 
-def fetch_bars(tickers=UNIVERSE, lookback=LOOKBACK_DAYS, interval="1d") -> pd.DataFrame:
-    end = datetime.utcnow()
-    start = end - timedelta(days=lookback)
-    df = yf.download(
-        tickers,
-        start=start,
-        end=end,
-        interval=interval,
-        group_by="ticker",
-        auto_adjust=True,
-        threads=True
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+# Yahoo rejects requests that don't look like they come from a browser.
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; pairsplus-bot)"}
+MAX_CONNECTIONS = 20
+
+# What fetch_bars raises when Yahoo is unreachable or returns unusable data.
+FETCH_ERRORS = (httpx.HTTPError, ValueError, KeyError)
+
+async def _fetch_one(client, ticker, start, end, interval) -> pd.Series:
+    """
+    Fetch adjusted closes for one ticker from the Yahoo v8 chart endpoint.
+    Returns None for unknown tickers.
+    """
+    response = await client.get(
+        CHART_URL.format(ticker=ticker),
+        params={
+            "period1": int(start.timestamp()),
+            "period2": int(end.timestamp()),
+            "interval": interval,
+            "events": "div,splits",
+        },
     )
-    closes = {t: df[t]["Close"].rename(t) for t in tickers}
-    return pd.concat(closes, axis=1)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
 
-def get_cache_path(tickers, interval):
+    chart = response.json()["chart"]
+    if chart.get("error") or not chart.get("result"):
+        raise ValueError(f"No chart data for {ticker}: {chart.get('error')}")
+    result = chart["result"][0]
+
+    # Adjusted closes are only published for daily and longer bars.
+    indicators = result["indicators"]
+    adjclose = indicators.get("adjclose")
+    closes = adjclose[0]["adjclose"] if adjclose else indicators["quote"][0]["close"]
+
+    index = pd.to_datetime(
+        np.asarray(result.get("timestamp", []), dtype=np.int64), unit="s", utc=True
+    ).tz_convert(result["meta"].get("exchangeTimezoneName", "America/New_York"))
+    if interval[-1] not in "mh":
+        index = index.tz_localize(None).normalize()
+
+    return pd.Series(np.array(closes, dtype=np.float64), index=index, name=ticker)
+
+async def _fetch_all(tickers, start, end, interval) -> list:
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS)
+    async with httpx.AsyncClient(
+        http2=True, limits=limits, headers=HTTP_HEADERS, timeout=30
+    ) as client:
+        return await asyncio.gather(
+            *(_fetch_one(client, t, start, end, interval) for t in tickers)
+        )
+
+def _run(coro):
+    """
+    Run a coroutine to completion, even when called from inside an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+def fetch_bars(tickers=UNIVERSE, lookback=None, interval="1d") -> pd.DataFrame:
+    if lookback is None:
+        lookback = lookback_days()
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=lookback)
+    closes = _run(_fetch_all(tickers, start, end, interval))
+    found = {t: s for t, s in zip(tickers, closes) if s is not None}
+    if not found:
+        raise ValueError(f"No chart data for any of: {tickers}")
+    # Unknown tickers stay in the frame as all-NaN columns.
+    return pd.concat(found, axis=1).reindex(columns=list(tickers))
+
+@lru_cache(maxsize=128)
+def _cache_path(tickers: tuple, interval: str) -> str:
     tickers_str = "_".join(sorted(tickers))
-    return os.path.join(DATA_DIR, f"bars_{tickers_str}_{interval}.csv")
+    return os.path.join(DATA_DIR, f"bars_{tickers_str}_{interval}.parquet")
+
+def get_cache_path(tickers, interval):
+    return _cache_path(tuple(tickers), interval)
+
+def _is_fresh(path) -> bool:
+    if not os.path.exists(path):
+        return False
+    mtime = datetime.fromtimestamp(os.path.getmtime(path))
+    return (datetime.utcnow() - mtime).total_seconds() < 86400
 
-def fetch_bars_cached(tickers=UNIVERSE, lookback=LOOKBACK_DAYS, interval="1d") -> pd.DataFrame:
+def fetch_bars_cached(tickers=UNIVERSE, lookback=None, interval="1d") -> pd.DataFrame:
     cache_path = get_cache_path(tickers, interval)
-    if os.path.exists(cache_path):
-        mtime = datetime.fromtimestamp(os.path.getmtime(cache_path))
-        if (datetime.utcnow() - mtime).total_seconds() < 86400:
-            return pd.read_csv(cache_path, index_col=0, parse_dates=True)
+    if _is_fresh(cache_path):
+        return pd.read_parquet(cache_path, engine="pyarrow")
     df = fetch_bars(tickers, lookback, interval)
-    df.to_csv(cache_path)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    df.to_parquet(cache_path, engine="pyarrow", compression="zstd")
     return df
\ No newline at end of file
@@ -11,33 +11,39 @@ Features:
 - Prometheus metrics
 """
 
-import decimal
 import time
 import logging
 import csv
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from .notifier import send_discord_message
 from prometheus_client import Counter, Gauge, start_http_server
 
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+from alpaca.common.exceptions import APIError
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.enums import OrderSide, OrderStatus, TimeInForce
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockLatestTradeRequest
 
 from .config import (
-    ALPACA_KEY,
-    ALPACA_SECRET,
-    ORDER_TYPE,
-    PEG_DISTANCE,
-    SPLIT_NOTIONAL,
+    alpaca_key,
+    alpaca_secret,
+    order_type,
+    peg_distance,
+    split_notional,
     BASE_DIR,
-    METRICS_PORT
+    metrics_port
 )
 
 # === Logging Setup ===
 LOG_FILE = BASE_DIR / "trade_log.txt"
 TRADE_LOG_CSV = BASE_DIR / "positions.csv"
+# Pair legs are submitted from worker threads; serialize CSV appends.
+_csv_lock = threading.Lock()
 
 log_format = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 logging.basicConfig(
@@ -58,8 +64,8 @@ orders_attempted_total = Counter('orders_attempted_total', 'Number of orders att
 equity_value = Gauge('equity_value', 'Simulated equity curve')
 
 # === Initialize Alpaca Clients ===
-client = TradingClient(ALPACA_KEY, ALPACA_SECRET, paper=True)
-data_client = StockHistoricalDataClient(ALPACA_KEY, ALPACA_SECRET)
+client = TradingClient(alpaca_key(), alpaca_secret(), paper=True)
+data_client = StockHistoricalDataClient(alpaca_key(), alpaca_secret())
 
 
 # === Helper: Fetch Latest Price ===
@@ -94,44 +100,66 @@ def log_trade_csv(action, ticker, qty, price=None):
         "qty": qty,
         "price": price or "N/A"
     }
-    TRADE_LOG_CSV.parent.mkdir(parents=True, exist_ok=True)
-    exists = TRADE_LOG_CSV.exists()
-
-    with open(TRADE_LOG_CSV, mode='a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=row.keys())
-        if not exists:
-            writer.writeheader()
-        writer.writerow(row)
+    with _csv_lock:
+        TRADE_LOG_CSV.parent.mkdir(parents=True, exist_ok=True)
+        exists = TRADE_LOG_CSV.exists()
+
+        with open(TRADE_LOG_CSV, mode='a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=row.keys())
+            if not exists:
+                writer.writeheader()
+            writer.writerow(row)
     logger.info(f"Logged trade to CSV: {row}")
 
 
 # === Helper: Place Order ===
+ORDER_ATTEMPTS = 3
+MAX_BACKOFF_SECONDS = 5.0
+
+
+def _is_retryable(exc):
+    """
+    Rate limits, server errors and transport failures are worth retrying.
+    API rejections (auth, validation, buying power) and local errors such
+    as an invalid request model are not.
+    """
+    if isinstance(exc, APIError):
+        status = exc.status_code
+        return status is None or status == 429 or status >= 500
+    return isinstance(exc, (RequestsConnectionError, Timeout))
+
+
 def place_order(req):
     """
-    Submit an order to Alpaca with retries.
+    Submit an order to Alpaca, retrying transient failures with
+    exponential backoff and jitter. Returns the accepted order, or None.
     """
     orders_attempted_total.inc()
-    for attempt in range(3):
+    for attempt in range(ORDER_ATTEMPTS):
         try:
             logger.info(f"Submitting order: {req}")
-            client.submit_order(order_data=req)
-            log_trade_csv(
-                action=req.side.value,
-                ticker=req.symbol,
-                qty=req.qty if hasattr(req, 'qty') else "fractional",
-                price="MARKET"
-            )
-            send_discord_message(
-                f"✅ Order: {req.side.value.upper()} {req.symbol} "
-                f"Qty: {req.qty if hasattr(req, 'qty') else 'fractional'}"
-            )
-            return True
+            order = client.submit_order(order_data=req)
+            break
         except Exception as e:
             logger.warning(f"Order failed (attempt {attempt + 1}): {str(e)}")
             trade_errors_total.inc()
-            time.sleep(2)
-    logger.error("❌ Order failed after 3 attempts.")
-    return False
+            if not _is_retryable(e):
+                logger.error("❌ Order rejected; not retrying.")
+                return None
+            if attempt < ORDER_ATTEMPTS - 1:
+                time.sleep(min(0.1 * 2 ** attempt + random.uniform(0, 0.1), MAX_BACKOFF_SECONDS))
+    else:
+        logger.error(f"❌ Order failed after {ORDER_ATTEMPTS} attempts.")
+        return None
+
+    # The order is accepted; bookkeeping failures must not resubmit it.
+    qty = req.qty if hasattr(req, 'qty') else "fractional"
+    try:
+        log_trade_csv(action=req.side.value, ticker=req.symbol, qty=qty, price="MARKET")
+        send_discord_message(f"✅ Order: {req.side.value.upper()} {req.symbol} Qty: {qty}")
+    except Exception as e:
+        logger.error(f"Order submitted but logging failed: {e}")
+    return order
 
 
 # === Helper: Build Market or Limit Order ===
@@ -144,7 +172,7 @@ def build_order_request(symbol, side, qty=None, notional=None, price=None):
     if qty is not None and qty <= 0:
         raise ValueError(f"[Execution] ERROR: Invalid qty for {symbol}: {qty}")
 
-    if ORDER_TYPE == "LIMIT":
+    if order_type() == "LIMIT":
         if price is None or price <= 0:
             raise ValueError(f"[Execution] ERROR: Missing or invalid price for LIMIT order on {symbol}")
         if qty is None and notional is not None:
@@ -152,21 +180,22 @@ def build_order_request(symbol, side, qty=None, notional=None, price=None):
             logger.info(f"Calculated qty for LIMIT order on {symbol}: {qty} shares from notional {notional}")
 
         # Round limit price to 2 decimals (avoiding sub-penny errors)
-        peg_factor = 1 + (PEG_DISTANCE if side == OrderSide.BUY else -PEG_DISTANCE)
+        peg = peg_distance()
+        peg_factor = 1 + (peg if side == OrderSide.BUY else -peg)
         limit_price = round(price * peg_factor, 2)
-        logger.info(f"Pegging {side.name} order for {symbol} at limit {limit_price} (peg distance {PEG_DISTANCE})")
+        logger.info(f"Pegging {side.name} order for {symbol} at limit {limit_price} (peg distance {peg})")
         return LimitOrderRequest(
             symbol=symbol,
             qty=int(qty),
             side=side,
             time_in_force=TimeInForce.DAY,
-            limit_price=decimal.Decimal(limit_price)
+            limit_price=limit_price
         )
     else:
         return MarketOrderRequest(
             symbol=symbol,
             qty=int(qty) if qty is not None else None,
-            notional=decimal.Decimal(notional) if notional else None,
+            notional=float(notional) if notional else None,
             side=side,
             time_in_force=TimeInForce.DAY,
         )
@@ -177,7 +206,7 @@ def maybe_split_notional(notional):
     """
     Split notional into halves if enabled.
     """
-    if SPLIT_NOTIONAL and notional > 20:
+    if split_notional() and notional > 20:
         half = notional / 2
         logger.info(f"Smart notional split: {notional} -> {half} + {half}")
         return [half, half]
@@ -217,32 +246,79 @@ def close_pair_trade(ticker_long, ticker_short, qty=1):
         send_discord_message(f"📉 Closed pair trade: SELL {ticker_long}, BUY {ticker_short}")
 
 
+# === Flatten an Accepted Order ===
+FLATTEN_TIMEOUT_SECONDS = 10.0
+FLATTEN_POLL_SECONDS = 0.25
+_TERMINAL_STATUSES = frozenset({
+    OrderStatus.CANCELED,
+    OrderStatus.FILLED,
+    OrderStatus.EXPIRED,
+    OrderStatus.REJECTED,
+})
+
+
+def _wait_until_terminal(order_id):
+    """
+    Poll an order until it can no longer fill. Returns the final order,
+    or None if it is still working after FLATTEN_TIMEOUT_SECONDS.
+    """
+    deadline = time.monotonic() + FLATTEN_TIMEOUT_SECONDS
+    while True:
+        order = client.get_order_by_id(order_id)
+        if order.status in _TERMINAL_STATUSES:
+            return order
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(FLATTEN_POLL_SECONDS)
+
+
+def flatten_order(order):
+    """
+    Cancel whatever of `order` is still working, wait until it can no
+    longer fill, then reverse the filled quantity with a market order.
+    Returns True once nothing from the order is left open.
+    """
+    try:
+        client.cancel_order_by_id(order.id)
+    except Exception as e:
+        logger.info(f"Cancel of {order.symbol} order {order.id} not applied: {e}")
+    try:
+        final = _wait_until_terminal(order.id)
+    except Exception as e:
+        logger.error(f"Failed to read fills for {order.symbol} order {order.id}: {e}")
+        return False
+    if final is None:
+        logger.error(f"{order.symbol} order {order.id} still working after cancel; fills unknown.")
+        return False
+
+    filled = float(final.filled_qty or 0)
+    if filled <= 0:
+        return True
+
+    opposite = OrderSide.SELL if order.side == OrderSide.BUY else OrderSide.BUY
+    req = MarketOrderRequest(
+        symbol=order.symbol,
+        qty=filled,
+        side=opposite,
+        time_in_force=TimeInForce.DAY,
+    )
+    return place_order(req) is not None
+
+
 # === Place New Pair Trade ===
 def place_pair_trade(ticker_long, ticker_short, notional=50):
     """
     Place new pair trade with notional split and pegged limit pricing.
+    All legs are submitted concurrently; if any leg fails, the legs that
+    did go through are cancelled and their fills reversed.
     """
     logger.info(f"Placing pair trade: LONG {ticker_long}, SHORT {ticker_short}, Notional: {notional}")
 
-    # --- Long leg ---
-    for chunk in maybe_split_notional(notional):
-        long_price = get_latest_price(ticker_long)
-        if long_price is None or long_price <= 0:
-            logger.error(f"[Execution] ERROR: Cannot place long order: invalid price for {ticker_long}")
-            return
-
-        long_req = build_order_request(
-            symbol=ticker_long,
-            side=OrderSide.BUY,
-            notional=chunk,
-            price=long_price
-        )
-        success_long = place_order(long_req)
-        if not success_long:
-            logger.error("[Execution] ERROR: Long leg order failed. Aborting pair trade.")
-            return
+    long_price = get_latest_price(ticker_long)
+    if long_price is None or long_price <= 0:
+        logger.error(f"[Execution] ERROR: Cannot place long order: invalid price for {ticker_long}")
+        return
 
-    # --- Short leg ---
     short_price = get_latest_price(ticker_short)
     if short_price is None or short_price <= 0:
         logger.error(f"[Execution] ERROR: Cannot place short order: invalid price for {ticker_short}")
@@ -251,29 +327,46 @@ def place_pair_trade(ticker_long, ticker_short, notional=50):
     qty_short = max(1, int(notional / short_price))
     logger.info(f"Calculated short qty for {ticker_short}: {qty_short} shares")
 
-    short_req = build_order_request(
-        symbol=ticker_short,
-        side=OrderSide.SELL,
-        qty=qty_short,
-        price=short_price
-    )
-    success_short = place_order(short_req)
+    legs = [
+        dict(symbol=ticker_long, side=OrderSide.BUY, notional=chunk, price=long_price)
+        for chunk in maybe_split_notional(notional)
+    ]
+    legs.append(dict(symbol=ticker_short, side=OrderSide.SELL, qty=qty_short, price=short_price))
+    reqs = [build_order_request(**leg) for leg in legs]
+
+    with ThreadPoolExecutor(max_workers=len(reqs)) as pool:
+        orders = list(pool.map(place_order, reqs))
 
-    if success_short:
+    if all(order is not None for order in orders):
         trades_opened_total.inc()
         logger.info("✅ Pair trade executed successfully.")
         send_discord_message(
             f"🚀 Executed pair trade: LONG {ticker_long}, SHORT {ticker_short}, Notional: {notional}"
         )
+        return
+
+    logger.error("[Execution] ERROR: Pair trade leg failed. Flattening the legs that went through.")
+    stuck = []
+    for order in orders:
+        if order is not None and not flatten_order(order):
+            logger.error(f"[Execution] ERROR: Could not flatten {order.symbol}; position left open.")
+            stuck.append(order.symbol)
+    if stuck:
+        send_discord_message(
+            f"❌ Pair trade failed and could not be unwound: LONG {ticker_long}, "
+            f"SHORT {ticker_short}. Check open positions in {', '.join(stuck)}."
+        )
     else:
-        logger.error("[Execution] ERROR: Short leg order failed. Pair trade incomplete.")
+        send_discord_message(
+            f"⚠️ Pair trade failed and was unwound: LONG {ticker_long}, SHORT {ticker_short}"
+        )
 
 
 # === Prometheus Exporter ===
 if __name__ == "__main__":
     try:
-        start_http_server(METRICS_PORT)
-        logger.info(f"[Metrics] Prometheus metrics server running at http://localhost:{METRICS_PORT}/metrics")
+        start_http_server(metrics_port())
+        logger.info(f"[Metrics] Prometheus metrics server running at http://localhost:{metrics_port()}/metrics")
         while True:
             time.sleep(60)
     except Exception as e:
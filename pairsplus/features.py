@@ -1,30 +1,48 @@
 import pandas as pd
 import numpy as np
+from . import signals
 
 def zscore(series, window=30):
     """Rolling z-score over a moving window."""
-    return (series - series.rolling(window).mean()) / series.rolling(window).std()
+    return signals.zscore(series, window)
 
 def spread_volatility(spread, window=30):
     """Rolling standard deviation of the spread."""
     return spread.rolling(window).std()
 
 def rolling_beta(y, x, window=60):
-    """Rolling hedge ratio (beta) over time."""
-    betas = []
-    for i in range(window, len(y)):
-        beta = np.polyfit(x[i-window:i], y[i-window:i], 1)[0]
-        betas.append(beta)
-    return pd.Series([np.nan]*window + betas, index=y.index)
+    """
+    Rolling hedge ratio (beta) over time.
+    The value at row i is the OLS slope of y on x over the `window` rows before i.
+    """
+    # Slope is shift-invariant; centring keeps the sums from cancelling.
+    xv = np.asarray(x, dtype=np.float64)
+    yv = np.asarray(y, dtype=np.float64)
+    xs = pd.Series(xv - np.nanmean(xv), index=y.index)
+    ys = pd.Series(yv - np.nanmean(yv), index=y.index)
+
+    sx = xs.rolling(window).sum()
+    sy = ys.rolling(window).sum()
+    sxy = (xs * ys).rolling(window).sum()
+    sxx = (xs * xs).rolling(window).sum()
+    beta = (window * sxy - sx * sy) / (window * sxx - sx * sx)
+    return beta.shift(1)
 
 def estimate_half_life(spread):
     """
     Estimate the half-life of mean reversion.
     Uses an AR(1) regression to estimate speed of mean reversion.
     """
-    lagged = spread.shift(1).dropna()
-    delta = spread.diff().dropna()
-    beta = np.polyfit(lagged, delta, 1)[0]
+    values = np.asarray(spread, dtype=np.float64)
+    x = values[:-1]
+    y = np.diff(values)
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+
+    # Closed-form OLS slope of delta on lagged level
+    xc = x - x.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (xc * (y - y.mean())).sum() / (xc * xc).sum()
     half_life = -np.log(2) / beta if beta != 0 else np.inf
     return half_life
 
@@ -61,8 +79,8 @@ def compute_features(spread, y=None, x=None, window=30):
     """
     features = pd.DataFrame(index=spread.index)
 
-    features['zscore'] = zscore(spread, window)
-    features['volatility'] = spread_volatility(spread, window)
+    # z-score and volatility share one rolling pass over the spread
+    features['zscore'], features['volatility'] = signals.zscore_and_std(spread, window)
     features['momentum'] = spread_momentum(spread, lag=5)
 
     # Half-life is scalar; broadcast to all rows for compatibility
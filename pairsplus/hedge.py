@@ -1,17 +1,40 @@
 # pairsplus/hedge.py
 import numpy as np
-from pykalman import KalmanFilter
+from ._jit import njit
+
+@njit(cache=True)
+def _kf_hedge(y, x, q=1e-5, r=1e-3):
+    # Random-walk state [beta, alpha] observed through H_t = [x_t, 1].
+    # The observation is scalar, so the innovation "inverse" is a division
+    # and the symmetric 2x2 covariance is tracked as three floats.
+    beta = 0.0
+    alpha = 0.0
+    p00, p01, p11 = 1.0, 0.0, 1.0
+
+    for t in range(y.shape[0]):
+        if t > 0:
+            p00 += q
+            p11 += q
+        h = x[t]
+        ph0 = p00 * h + p01
+        ph1 = p01 * h + p11
+        s = h * ph0 + ph1 + r
+        k0 = ph0 / s
+        k1 = ph1 / s
+        innov = y[t] - (h * beta + alpha)
+        beta += k0 * innov
+        alpha += k1 * innov
+        p00 -= k0 * ph0
+        p01 -= k0 * ph1
+        p11 -= k1 * ph1
+
+    return alpha, beta
 
 def kalman_hedge_ratio(y, x):
-    kf = KalmanFilter(
-        transition_matrices=np.eye(2),
-        observation_matrices=np.vstack([x, np.ones_like(x)]).T[:, None, :],
-        transition_covariance=1e-5 * np.eye(2),
-        observation_covariance=1e-3
+    return _kf_hedge(
+        np.asarray(y, dtype=np.float64),
+        np.asarray(x, dtype=np.float64)
     )
-    state_means, _ = kf.filter(np.vstack(y))
-    beta, alpha = state_means[-1]
-    return alpha, beta
 
 def test_kalman_hedge_ratio():
     x = np.linspace(0, 10, 100) + np.random.normal(0, 0.1, 100)
@@ -5,12 +5,21 @@ Loads best hyperparameters from JSON.
 """
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
 BEST_PARAMS_FILE = Path(__file__).parent.parent / "best_hyperparams.json"
 
+@lru_cache(maxsize=1)
+def _load(path: str, mtime_ns: int) -> dict:
+    # mtime_ns is only part of the cache key, so a rewritten file is re-read.
+    with open(path) as f:
+        return json.load(f)
+
 def load_best_hyperparameters():
-    if not BEST_PARAMS_FILE.exists():
-        raise FileNotFoundError(f"Best hyperparameters file not found: {BEST_PARAMS_FILE}")
-    with open(BEST_PARAMS_FILE) as f:
-        return json.load(f)
\ No newline at end of file
+    try:
+        mtime_ns = BEST_PARAMS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Best hyperparameters file not found: {BEST_PARAMS_FILE}") from None
+    # Hand out a copy so callers cannot mutate the cached dict.
+    return dict(_load(str(BEST_PARAMS_FILE), mtime_ns))
\ No newline at end of file
@@ -2,39 +2,57 @@
 pairsplus/metrics.py
 
 Prometheus metrics for monitoring trades, errors, and performance.
+
+prometheus_client is only imported, and the metrics only registered, the
+first time a metric is touched or the server is started.
 """
 
-from prometheus_client import Counter, Gauge, start_http_server
 import threading
+from functools import lru_cache
 
 # === METRICS ===
 
-TRADES_OPENED = Counter('trades_opened_total', 'Number of trades opened')
-TRADES_CLOSED = Counter('trades_closed_total', 'Number of trades closed')
-ERRORS = Counter('errors_total', 'Number of errors encountered')
-WIN_TRADES = Counter('trades_win_total', 'Number of winning trades')
-LOSS_TRADES = Counter('trades_loss_total', 'Number of losing trades')
-EQUITY = Gauge('equity_value', 'Current simulated equity curve')
+@lru_cache(maxsize=None)
+def _metrics() -> dict:
+    from prometheus_client import Counter, Gauge
+
+    return {
+        "TRADES_OPENED": Counter('trades_opened_total', 'Number of trades opened'),
+        "TRADES_CLOSED": Counter('trades_closed_total', 'Number of trades closed'),
+        "ERRORS": Counter('errors_total', 'Number of errors encountered'),
+        "WIN_TRADES": Counter('trades_win_total', 'Number of winning trades'),
+        "LOSS_TRADES": Counter('trades_loss_total', 'Number of losing trades'),
+        "EQUITY": Gauge('equity_value', 'Current simulated equity curve'),
+    }
+
+def __getattr__(name):
+    # Keeps `metrics.TRADES_OPENED` etc. working without eager registration.
+    if name.isupper():
+        try:
+            return _metrics()[name]
+        except KeyError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === HELPERS ===
 
 def inc_trade_open():
-    TRADES_OPENED.inc()
+    _metrics()["TRADES_OPENED"].inc()
 
 def inc_trade_close():
-    TRADES_CLOSED.inc()
+    _metrics()["TRADES_CLOSED"].inc()
 
 def inc_error():
-    ERRORS.inc()
+    _metrics()["ERRORS"].inc()
 
 def inc_win():
-    WIN_TRADES.inc()
+    _metrics()["WIN_TRADES"].inc()
 
 def inc_loss():
-    LOSS_TRADES.inc()
+    _metrics()["LOSS_TRADES"].inc()
 
 def set_equity(value):
-    EQUITY.set(value)
+    _metrics()["EQUITY"].set(value)
 
 # === START SERVER ===
 
@@ -42,6 +60,10 @@ def start_metrics_server(port=8000):
     """
     Start Prometheus /metrics server on separate thread.
     """
+    from prometheus_client import start_http_server
+
+    _metrics()
+
     def server_thread():
         print(f"[Metrics] Prometheus /metrics endpoint on http://localhost:{port}/metrics")
         start_http_server(port)
@@ -4,35 +4,109 @@ pairsplus/notifier.py
 Sends messages to Discord webhook for monitoring.
 """
 
+import atexit
 import logging
-import requests
+import queue
+import threading
+import time
 from . import config
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-WEBHOOK_URL = config.DISCORD_WEBHOOK_URL
+# Messages are queued and posted from a background thread, several to a
+# webhook call, so a trading cycle never waits on Discord.
+FLUSH_SECONDS = 1.0
+MAX_BATCH = 10
+DISCORD_MAX_CHARS = 2000
 
-if not WEBHOOK_URL:
-    logger.warning("[Notifier] DISCORD_WEBHOOK_URL is missing in environment. Discord notifications will be disabled.")
+_queue = queue.Queue(maxsize=1000)
+_worker = None
+_worker_lock = threading.Lock()
+_STOP = object()
+# Only the worker thread posts, so one keep-alive session is reused for every
+# webhook call instead of paying a fresh TCP/TLS handshake each time.
+_session = None
 
 def send_discord_message(content: str):
     """
-    Posts a message to Discord via webhook if configured.
+    Queues a message for the Discord webhook if configured.
     """
-    if not WEBHOOK_URL:
+    if not config.discord_webhook_url():
         logger.debug("[Notifier] Skipping Discord send—no webhook URL.")
         return
 
-    payload = {"content": content}
+    _ensure_worker()
     try:
-        response = requests.post(WEBHOOK_URL, json=payload, timeout=5)
-        if response.status_code == 204:
-            logger.info("[Notifier] Message sent to Discord successfully.")
+        _queue.put_nowait(content)
+    except queue.Full:
+        logger.error("[Notifier] Discord queue full, dropping message.")
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run, name="discord-notifier", daemon=True)
+            _worker.start()
+            atexit.register(_shutdown)
+
+def _shutdown():
+    _queue.put(_STOP)
+    _worker.join(timeout=10)
+    if _session is not None:
+        _session.close()
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + FLUSH_SECONDS
+        while batch[-1] is not _STOP and len(batch) < MAX_BATCH:
+            try:
+                batch.append(_queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        stop = batch[-1] is _STOP
+        if stop:
+            batch.pop()
+        for content in _chunks(batch):
+            # Any failure stays with its post; the worker must outlive it.
+            try:
+                _post(content)
+            except Exception as e:
+                logger.error(f"[Notifier] Exception sending Discord message: {e}")
+        if stop:
+            return
+
+def _chunks(messages):
+    """
+    Joins messages with newlines into as few posts as fit Discord's limit.
+    """
+    chunk = ""
+    for msg in messages:
+        if chunk and len(chunk) + 1 + len(msg) > DISCORD_MAX_CHARS:
+            yield chunk
+            chunk = msg
         else:
-            logger.error(
-                f"[Notifier] Discord webhook error: {response.status_code} {response.text}"
-            )
-    except requests.exceptions.RequestException as e:
-        logger.error(f"[Notifier] Exception sending Discord message: {e}")
\ No newline at end of file
+            chunk = f"{chunk}\n{msg}" if chunk else msg
+    if chunk:
+        yield chunk
+
+def _get_session():
+    global _session
+    if _session is None:
+        import requests  # deferred: only needed once a webhook is configured
+        _session = requests.Session()
+    return _session
+
+def _post(content):
+    # Transport errors propagate to _run, which logs them per post.
+    response = _get_session().post(
+        config.discord_webhook_url(), json={"content": content}, timeout=5
+    )
+    if response.status_code == 204:
+        logger.info("[Notifier] Message sent to Discord successfully.")
+    else:
+        logger.error(
+            f"[Notifier] Discord webhook error: {response.status_code} {response.text}"
+        )
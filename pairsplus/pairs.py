@@ -7,7 +7,16 @@ Cointegration detection between asset price series.
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.stattools import coint
+from statsmodels.tsa.adfvalues import (
+    tau_c_largep, tau_c_smallp, tau_max_c, tau_min_c, tau_star_c
+)
+from scipy.stats import norm
 from itertools import combinations
+from numpy.lib.stride_tricks import sliding_window_view
+from joblib import Parallel, delayed, effective_n_jobs
+
+# Same cutoff `coint` uses to flag (almost) perfectly collinear legs.
+_COLLINEAR_R2 = 1 - 100 * np.sqrt(np.finfo(float).eps)
 
 def clean_pair_series(s1, s2, min_length=30):
     s1 = s1.replace([np.inf, -np.inf], np.nan).dropna()
@@ -23,50 +32,299 @@ def clean_pair_series(s1, s2, min_length=30):
 
     return s1, s2
 
-def find_cointegrated(df: pd.DataFrame, max_pairs: int = 10, pval_threshold: float = 1.0) -> pd.DataFrame:
-    scores = []
-    for (a, b) in combinations(df.columns, 2):
-        s1, s2 = clean_pair_series(df[a], df[b])
-        if s1 is None or s2 is None:
-            continue
+def _finite_coint_pval(y: np.ndarray, x: np.ndarray, min_length: int = 30) -> float:
+    """
+    `_aligned_coint_pval` for aligned arrays: keeps the rows where both are
+    finite, like `clean_pair_series` does for a pair from one frame.
+    """
+    keep = np.isfinite(y) & np.isfinite(x)
+    if keep.sum() < min_length:
+        return np.nan
+
+    try:
+        _, pval, _ = coint(y[keep], x[keep])
+    except Exception:
+        return np.nan
+    return pval
+
+def _clean_column(s: pd.Series) -> pd.Series:
+    return s.replace([np.inf, -np.inf], np.nan).dropna()
+
+def _aligned_coint_pval(s1: pd.Series, s2: pd.Series, min_length: int = 30) -> float:
+    """
+    `coint` p-value of two columns already passed through `_clean_column`,
+    on their common dates; the pairwise half of `clean_pair_series`. NaN
+    when the overlap is too short or the test fails.
+    """
+    s1, s2 = s1.align(s2, join="inner")
+    if len(s1) < min_length:
+        return np.nan
+
+    try:
+        _, pval, _ = coint(s1, s2)
+    except Exception:
+        return np.nan
+    return pval
+
+def _solve(gram: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """
+    Solve a stack of normal equations `gram[p] @ coef[p] = rhs[p]`.
+    """
+    try:
+        return np.linalg.solve(gram, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum("pij,pj->pi", np.linalg.pinv(gram), rhs)
+
+def _adf_design(resid: np.ndarray, diff: np.ndarray, lags: int, nobs: int) -> np.ndarray:
+    """
+    ADF regressors for the last `nobs` differences of every column, shaped
+    (nobs, P, lags + 1): the lagged level, then `lags` lagged differences.
+    """
+    end = resid.shape[0] - 1
+    cols = [resid[end - nobs:end]]
+    for k in range(1, lags + 1):
+        cols.append(diff[end - nobs - k:end - k])
+    return np.stack(cols, axis=2)
+
+def _mackinnonp_c2(stat: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `mackinnonp(stat, regression="c", N=2)`: MacKinnon (1994)
+    p-values for a two-series Engle-Granger test with a constant.
+    """
+    with np.errstate(invalid="ignore"):
+        small = np.polyval(tau_c_smallp[1][::-1], stat)
+        large = np.polyval(tau_c_largep[1][::-1], stat)
+        pval = norm.cdf(np.where(stat <= tau_star_c[1], small, large))
+    pval = np.where(stat > tau_max_c[1], 1.0, pval)
+    return np.where(stat < tau_min_c[1], 0.0, pval)
+
+def _coint_batch(y: np.ndarray, x: np.ndarray):
+    """
+    Engle-Granger test for many pairs at once, matching statsmodels
+    `coint(y, x)` with its defaults (constant, AIC lag selection).
+
+    `y` and `x` are (T, P) arrays with one pair per column. The cointegrating
+    OLS, the lag search and the final ADF regression are each solved for
+    all pairs together from stacked normal equations instead of P separate
+    statsmodels fits. Returns (adf_stat, pval) arrays; degenerate pairs get
+    NaN, where `coint` would have raised.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Cointegrating regression y = alpha + beta * x
+        xc = x - x.mean(axis=0)
+        yc = y - y.mean(axis=0)
+        beta = np.einsum("tp,tp->p", xc, yc) / np.einsum("tp,tp->p", xc, xc)
+        resid = yc - beta * xc
+        r2 = 1 - np.einsum("tp,tp->p", resid, resid) / np.einsum("tp,tp->p", yc, yc)
+
+    degenerate = ~np.isfinite(beta) | (resid.max(axis=0) == resid.min(axis=0))
+    return _adf_batch(resid, r2, degenerate)
+
+def _adf_batch(resid: np.ndarray, r2: np.ndarray, degenerate: np.ndarray):
+    """
+    ADF stage of `_coint_batch` on (T, P) cointegrating residuals, given
+    each pair's regression R^2 and a mask of pairs to report as NaN.
+    """
+    T, P = resid.shape
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff = np.diff(resid, axis=0)
+
+        # 1. Lag length by AIC, all candidates fitted on a common sample
+        maxlag = min(int(np.ceil(12.0 * (T / 100.0) ** 0.25)), T // 2 - 1)
+        nobs = T - 1 - maxlag
+        z = _adf_design(resid, diff, maxlag, nobs)
+        target = diff[-nobs:]
+        gram = np.einsum("tpi,tpj->pij", z, z)
+        zty = np.einsum("tpi,tp->pi", z, target)
+        yty = np.einsum("tp,tp->p", target, target)
+        aic = np.empty((maxlag + 1, P))
+        for k in range(1, maxlag + 2):
+            coef = _solve(gram[:, :k, :k], zty[:, :k])
+            ssr = yty - np.einsum("pi,pi->p", coef, zty[:, :k])
+            aic[k - 1] = nobs * np.log(ssr / nobs) + 2 * k
+        usedlag = np.argmin(np.nan_to_num(aic, nan=np.inf), axis=0)
+
+        # 2. Refit each pair with its chosen lag on the full sample
+        stat = np.full(P, np.nan)
+        for lag in np.unique(usedlag):
+            idx = np.flatnonzero(usedlag == lag)
+            n = T - 1 - lag
+            z = _adf_design(resid[:, idx], diff[:, idx], lag, n)
+            target = diff[-n:, idx]
+            gram = np.einsum("tpi,tpj->pij", z, z)
+            coef = _solve(gram, np.einsum("tpi,tp->pi", z, target))
+            err = target - np.einsum("tpi,pi->tp", z, coef)
+            sigma2 = np.einsum("tp,tp->p", err, err) / (n - lag - 1)
+            unit = np.zeros((len(idx), lag + 1))
+            unit[:, 0] = 1.0
+            stat[idx] = coef[:, 0] / np.sqrt(sigma2 * _solve(gram, unit)[:, 0])
+
+    stat = np.where(r2 < _COLLINEAR_R2, stat, -np.inf)
+    stat[degenerate] = np.nan
+
+    pval = _mackinnonp_c2(stat)
+    return stat, pval
+
+def correlated_pairs(df: pd.DataFrame, min_corr: float = 0.6) -> list:
+    """
+    Candidate pairs whose log-return correlation is above `min_corr`.
+
+    A cheap screen run before the Engle-Granger test: pairs whose returns
+    barely co-move are very unlikely to be cointegrated.
+    """
+    return _correlated_pairs(df.to_numpy(dtype=np.float64), df.columns, min_corr)
 
-        try:
-            score, pval, _ = coint(s1, s2)
-        except Exception:
-            continue
+def _correlated_pairs(arr: np.ndarray, cols, min_corr: float) -> list:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(arr), axis=0)
 
-        if np.isfinite(pval) and pval <= pval_threshold:
-            scores.append((pval, a, b))
+    if np.isfinite(returns).all():
+        corr = np.corrcoef(returns, rowvar=False)
+    else:
+        # Gappy data: fall back to pairwise-complete correlations.
+        corr = pd.DataFrame(returns).replace([np.inf, -np.inf], np.nan).corr(min_periods=30).to_numpy()
+
+    i, j = np.triu_indices(len(cols), k=1)
+    keep = corr[i, j] > min_corr
+    return [(cols[x], cols[y]) for x, y in zip(i[keep], j[keep])]
+
+def find_cointegrated(
+    df: pd.DataFrame,
+    max_pairs: int = 10,
+    pval_threshold: float = 1.0,
+    min_corr: float = 0.6,
+    n_jobs: int = -1
+) -> pd.DataFrame:
+    """
+    Rank pairs by Engle-Granger p-value. Pairs whose return correlation is
+    not above `min_corr` are skipped without testing; pass None to test all.
+    Pairs with gaps are tested on `n_jobs` threads.
+    """
+    # One float64 copy of the prices feeds both the screen and the batch test.
+    arr = df.to_numpy(dtype=np.float64)
+    if min_corr is None:
+        candidates = list(combinations(df.columns, 2))
+    else:
+        candidates = _correlated_pairs(arr, df.columns, min_corr)
+
+    # Pairs whose columns have no gaps share one sample and are tested in a
+    # single batch; the rest go through `coint` one by one after cleaning.
+    pos = {c: i for i, c in enumerate(df.columns)}
+    complete = np.isfinite(arr).all(axis=0) & (len(df) >= 30)
+    batch = [(a, b) for a, b in candidates if complete[pos[a]] and complete[pos[b]]]
+    rest = [(a, b) for a, b in candidates if not (complete[pos[a]] and complete[pos[b]])]
+
+    scores = []
+    if batch:
+        _, pvals = _coint_batch(
+            arr[:, [pos[a] for a, _ in batch]],
+            arr[:, [pos[b] for _, b in batch]]
+        )
+        for (a, b), pval in zip(batch, pvals):
+            if np.isfinite(pval) and pval <= pval_threshold:
+                scores.append((pval, a, b))
+
+    if rest:
+        # Clean every column once; each pair then only aligns two of them.
+        clean = {c: _clean_column(df[c]) for c in {c for pair in rest for c in pair}}
+        pvals = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_aligned_coint_pval)(clean[a], clean[b]) for a, b in rest
+        )
+        for (a, b), pval in zip(rest, pvals):
+            if np.isfinite(pval) and pval <= pval_threshold:
+                scores.append((pval, a, b))
 
     scores.sort()
     top_scores = scores[:max_pairs]
 
     return pd.DataFrame(top_scores, columns=["pval", "a", "b"])
 
-def find_rolling_cointegrated(df: pd.DataFrame, window: int = 100, max_pairs: int = 10, pval_threshold: float = 1.0) -> pd.DataFrame:
-    results = []
+def find_rolling_cointegrated(df: pd.DataFrame, window: int = 100, max_pairs: int = 10, pval_threshold: float = 1.0, n_jobs: int = -1) -> pd.DataFrame:
+    """
+    Engle-Granger test of every pair on each `window`-row slice of `df`.
+
+    The cointegrating OLS of each window comes from running sums of x, x*x
+    and x*y, so sliding the window costs O(1) per pair; the residuals are
+    then built only for the window being tested and its ADF regressions
+    are batched over pairs. Windows where a pair has gaps are tested one
+    by one with `coint` after cleaning, as before. Windows are scanned in
+    contiguous chunks on `n_jobs` threads; numpy's linear algebra releases
+    the GIL.
+    """
     cols = df.columns
     combs = list(combinations(cols, 2))
+    ia, ib = np.triu_indices(len(cols), k=1)
 
-    for start in range(len(df) - window + 1):
-        end = start + window
-        window_df = df.iloc[start:end]
-        window_scores = []
+    arr = df.to_numpy(dtype=np.float64)
+    finite = np.isfinite(arr)
 
-        for (a, b) in combs:
-            s1, s2 = clean_pair_series(window_df[a], window_df[b])
-            if s1 is None or s2 is None:
-                continue
+    # Centring each column first keeps the running sums from cancelling.
+    filled = np.where(finite, arr, 0.0)
+    centred = np.where(finite, filled - filled.sum(axis=0) / np.maximum(finite.sum(axis=0), 1), 0.0)
 
-            try:
-                score, pval, _ = coint(s1, s2)
-            except Exception:
-                continue
+    def running(v):
+        return np.concatenate((np.zeros((1, v.shape[1])), np.cumsum(v, axis=0)))
 
-            if np.isfinite(pval) and pval <= pval_threshold:
-                window_scores.append((pval, a, b, start, end))
+    c1 = running(centred)
+    c2 = running(centred * centred)
+    cxy = running(centred[:, ia] * centred[:, ib])
+    gaps = running(~finite)
+
+    # (n_windows, n_cols, window) views; no per-window copies or iloc frames.
+    raw_windows = sliding_window_view(arr, window, axis=0) if len(df) >= window else None
+    centred_windows = sliding_window_view(centred, window, axis=0) if len(df) >= window else None
+
+    def scan(starts):
+        found = []
+        for start in starts:
+            end = start + window
+            window_scores = []
+
+            clean = (gaps[end] - gaps[start]) == 0
+            batch = np.flatnonzero(clean[ia] & clean[ib]) if window >= 30 else np.empty(0, dtype=int)
+
+            if batch.size:
+                a_idx, b_idx = ia[batch], ib[batch]
+                s1 = c1[end] - c1[start]
+                mean = s1 / window
+                sxx = (c2[end] - c2[start]) - s1 * mean
+                sab = (cxy[end, batch] - cxy[start, batch]) - s1[a_idx] * mean[b_idx]
 
-        window_scores.sort()
-        results.extend(window_scores[:max_pairs])
+                win = centred_windows[start].T
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    beta = sab / sxx[b_idx]
+                    r2 = sab * sab / (sxx[a_idx] * sxx[b_idx])
+                    resid = (win[:, a_idx] - mean[a_idx]) - beta * (win[:, b_idx] - mean[b_idx])
+
+                flat = win.max(axis=0) == win.min(axis=0)
+                degenerate = (
+                    flat[a_idx] | flat[b_idx] | ~np.isfinite(beta)
+                    | (resid.max(axis=0) == resid.min(axis=0))
+                )
+                _, pvals = _adf_batch(resid, r2, degenerate)
+                for k, pval in zip(batch, pvals):
+                    if np.isfinite(pval) and pval <= pval_threshold:
+                        a, b = combs[k]
+                        window_scores.append((pval, a, b, start, end))
+
+            rest = np.flatnonzero(~(clean[ia] & clean[ib]))
+            if rest.size:
+                raw = raw_windows[start]
+                for k in rest:
+                    a, b = combs[k]
+                    pval = _finite_coint_pval(raw[ia[k]], raw[ib[k]])
+                    if np.isfinite(pval) and pval <= pval_threshold:
+                        window_scores.append((pval, a, b, start, end))
+
+            window_scores.sort()
+            found.extend(window_scores[:max_pairs])
+        return found
+
+    starts = np.arange(len(df) - window + 1)
+    chunks = [c for c in np.array_split(starts, 4 * effective_n_jobs(n_jobs)) if c.size]
+    results = []
+    for found in Parallel(n_jobs=n_jobs, prefer="threads")(delayed(scan)(c) for c in chunks):
+        results.extend(found)
 
-    return pd.DataFrame(results, columns=["pval", "a", "b", "start", "end"])
\ No newline at end of file
+    return pd.DataFrame(results, columns=["pval", "a", "b", "start", "end"])
@@ -1,10 +1,12 @@
-def sim_backtest(df, signal):
-    # Example logic:
-    spread = df.iloc[:, 0] - df.iloc[:, 1]
-    if signal['action'] == "LONG_SPREAD":
-        pnl = spread.diff().sum() * 1  # Simulate long spread
-    elif signal['action'] == "SHORT_SPREAD":
-        pnl = -spread.diff().sum() * 1
-    else:
-        pnl = 0
-    return pnl
+import numpy as np
+
+# Position taken on the spread for each signal action.
+_POSITION = {"LONG_SPREAD": 1.0, "SHORT_SPREAD": -1.0}
+
+def sim_backtest(a_prices, b_prices, signal):
+    # Example logic: hold the signalled position on the spread for the whole window
+    position = _POSITION.get(signal['action'])
+    if position is None:
+        return 0
+    spread = np.asarray(a_prices, dtype=np.float64) - np.asarray(b_prices, dtype=np.float64)
+    return position * np.nansum(np.diff(spread))
@@ -7,44 +7,158 @@ Generates trading signals based on spread z-scores and Kalman filtering.
 import pandas as pd
 import numpy as np
 from .tune_config import DEFAULT_HYPERPARAMS
+from ._jit import njit
+
+_Z_DEFAULT = DEFAULT_HYPERPARAMS["z_threshold"]
+_W_DEFAULT = DEFAULT_HYPERPARAMS["rolling_window"]
+_K_DEFAULT = DEFAULT_HYPERPARAMS["kalman_cov"]
+
+@njit(cache=True, error_model="numpy")
+def _rolling_zscore_std(values: np.ndarray, window: int):
+    """
+    Rolling z-score and sample std of finite values in a single O(T) pass,
+    using a sliding Welford update of the window mean and sum of squared
+    deviations. The update is re-anchored with an exact two-pass sum once
+    per window, so its rounding error can't accumulate over a long series.
+    NaN until a full window is available, like pandas.
+    """
+    n = values.shape[0]
+    z = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window or window < 2:
+        return z, std
+
+    mean = 0.0
+    m2 = 0.0
+    last_change = 0
+
+    for i in range(n):
+        x = values[i]
+        if i > 0 and x != values[i - 1]:
+            last_change = i
+        if i < window:
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+        elif (i + 1) % window == 0:
+            start = i - window + 1
+            total = 0.0
+            for k in range(start, i + 1):
+                total += values[k]
+            mean = total / window
+            m2 = 0.0
+            for k in range(start, i + 1):
+                m2 += (values[k] - mean) ** 2
+        else:
+            old = values[i - window]
+            new_mean = mean + (x - old) / window
+            m2 += (x - old) * (x - new_mean + old - mean)
+            mean = new_mean
+        if i < window - 1:
+            continue
+
+        if last_change <= i - window + 1:
+            # Flat window: pandas gives std 0 and mean == value, so z is 0 / 0.
+            std[i] = 0.0
+            continue
+        std[i] = np.sqrt(max(m2, 0.0) / (window - 1))
+        z[i] = (x - mean) / std[i]
+
+    return z, std
+
+def _zscore_std_arr(values: np.ndarray, rolling_window: int):
+    """
+    ndarray core of `zscore_and_std`, for internal callers that don't need
+    an index.
+    """
+    if np.isfinite(values).all():
+        return _rolling_zscore_std(values, int(rolling_window))
+    # Running sums would smear a single NaN over the rest of the series.
+    rolling = pd.Series(values).rolling(rolling_window)
+    std = rolling.std().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (values - rolling.mean().to_numpy()) / std
+    return z, std
+
+def _zscore_last(values: np.ndarray, rolling_window: int) -> float:
+    """
+    The last element of the rolling z-score of `values`, from the final
+    window alone: O(window) instead of O(T).
+    """
+    if rolling_window < 2 or values.shape[0] < rolling_window:
+        return np.nan
+    tail = values[-rolling_window:]
+    if tail.min() == tail.max():
+        # Flat window: pandas gives 0 / 0 here.
+        return np.nan
+    with np.errstate(invalid="ignore"):
+        return (tail[-1] - tail.mean()) / tail.std(ddof=1)
+
+def zscore_and_std(series: pd.Series, rolling_window: int):
+    """
+    Rolling z-score and rolling std of `series` from the same pass.
+    """
+    z, std = _zscore_std_arr(series.to_numpy(dtype=np.float64), rolling_window)
+    return (
+        pd.Series(z, index=series.index, name=series.name),
+        pd.Series(std, index=series.index, name=series.name)
+    )
 
 def zscore(series: pd.Series, rolling_window: int) -> pd.Series:
-    return (series - series.rolling(rolling_window).mean()) / series.rolling(rolling_window).std()
-
-def kalman_filter(spread: pd.Series, kalman_cov: float) -> pd.Series:
+    return zscore_and_std(series, rolling_window)[0]
+
+@njit(cache=True, fastmath=True)
+def _kalman_scalar(obs: np.ndarray, cov: float) -> np.ndarray:
+    """
+    Scalar random-walk Kalman filter with process and observation
+    variance both `cov`; returns the filtered state means.
+    """
+    out = np.empty_like(obs)
     state_mean = 0.0
     state_var = 1.0
-    result = []
 
-    for obs in spread:
-        pred_mean = state_mean
-        pred_var = state_var + kalman_cov
+    for i in range(obs.shape[0]):
+        pred_var = state_var + cov
+        kalman_gain = pred_var / (pred_var + cov)
+        state_mean += kalman_gain * (obs[i] - state_mean)
+        state_var = (1.0 - kalman_gain) * pred_var
+        out[i] = state_mean
 
-        kalman_gain = pred_var / (pred_var + kalman_cov)
-        state_mean = pred_mean + kalman_gain * (obs - pred_mean)
-        state_var = (1 - kalman_gain) * pred_var
-
-        result.append(state_mean)
+    return out
 
+def kalman_filter(spread: pd.Series, kalman_cov: float) -> pd.Series:
+    result = _kalman_scalar(spread.to_numpy(dtype=np.float64), float(kalman_cov))
     return pd.Series(result, index=spread.index)
 
+@njit(cache=True, fastmath=True)
+def _kalman_spread(a_prices: np.ndarray, b_prices: np.ndarray, kalman_cov: float) -> np.ndarray:
+    """
+    Kalman-smoothed spread `a - b`; the per-pair hot path of
+    `signal_from_spread`.
+    """
+    return _kalman_scalar(a_prices - b_prices, kalman_cov)
+
 def signal_from_spread(
-    df: pd.DataFrame,
+    a_prices: np.ndarray,
+    b_prices: np.ndarray,
     a: str,
     b: str,
     z_threshold: float = None,
     rolling_window: int = None,
     kalman_cov: float = None
 ) -> dict:
-    z_threshold = z_threshold or DEFAULT_HYPERPARAMS["z_threshold"]
-    rolling_window = rolling_window or DEFAULT_HYPERPARAMS["rolling_window"]
-    kalman_cov = kalman_cov or DEFAULT_HYPERPARAMS["kalman_cov"]
-
-    spread = df[a] - df[b]
-    spread_smoothed = kalman_filter(spread, kalman_cov)
+    z_threshold = z_threshold if z_threshold is not None else _Z_DEFAULT
+    rolling_window = rolling_window if rolling_window is not None else _W_DEFAULT
+    kalman_cov = kalman_cov if kalman_cov is not None else _K_DEFAULT
+
+    # Plain arrays end to end; only the last z-score is needed.
+    spread_smoothed = _kalman_spread(
+        np.asarray(a_prices, dtype=np.float64),
+        np.asarray(b_prices, dtype=np.float64),
+        float(kalman_cov)
+    )
 
-    z = zscore(spread_smoothed, rolling_window)
-    latest = z.iloc[-1]
+    latest = _zscore_last(spread_smoothed, int(rolling_window))
 
     if latest > z_threshold:
         return {"action": "SHORT_SPREAD", "pair": (a, b), "z": latest}
@@ -52,44 +166,56 @@ def signal_from_spread(
         return {"action": "LONG_SPREAD", "pair": (a, b), "z": latest}
     return None
 
-# --------------- TESTS BELOW ---------------
-
-def test_zscore():
-    series = pd.Series(range(1, 101))
-    result = zscore(series, rolling_window=20)
-    assert result[:19].isna().all()
-    assert np.isfinite(result[19:]).all()
-
-def test_kalman_filter():
-    series = pd.Series([10]*50 + [20]*50)
-    smoothed = kalman_filter(series, kalman_cov=0.001)
-    assert len(smoothed) == len(series)
-    assert np.all(np.isfinite(smoothed))
-
-def test_signal_from_spread_short(monkeypatch):
-    df = pd.DataFrame({
-        "A": [i * 2 for i in range(100)],
-        "B": list(range(100))
-    })
-    signal = signal_from_spread(
-        df, "A", "B",
-        z_threshold=0.5,
-        rolling_window=20,
-        kalman_cov=0.001
-    )
-    assert signal is not None
-    assert signal["action"] in {"SHORT_SPREAD", "LONG_SPREAD"}
-    assert isinstance(signal["z"], float)
-
-def test_signal_from_spread_none():
-    df = pd.DataFrame({
-        "A": [10]*100,
-        "B": [10]*100
-    })
-    signal = signal_from_spread(
-        df, "A", "B",
-        z_threshold=1.5,
-        rolling_window=20,
-        kalman_cov=0.001
-    )
-    assert signal is None
\ No newline at end of file
+@njit(cache=True, fastmath=True)
+def _kalman_columns(obs: np.ndarray, cov: float) -> np.ndarray:
+    """
+    `_kalman_scalar` applied to every column of `obs` at once. The gain
+    sequence doesn't depend on the observations, so it is shared.
+    """
+    out = np.empty_like(obs)
+    state_mean = np.zeros(obs.shape[1])
+    state_var = 1.0
+
+    for i in range(obs.shape[0]):
+        pred_var = state_var + cov
+        kalman_gain = pred_var / (pred_var + cov)
+        for j in range(obs.shape[1]):
+            state_mean[j] += kalman_gain * (obs[i, j] - state_mean[j])
+            out[i, j] = state_mean[j]
+        state_var = (1.0 - kalman_gain) * pred_var
+
+    return out
+
+def signal_from_spreads(
+    prices: np.ndarray,
+    pair_idx: np.ndarray,
+    z_threshold: float = None,
+    rolling_window: int = None,
+    kalman_cov: float = None
+):
+    """
+    `signal_from_spread` for many pairs at once. `prices` is a (T, N)
+    price matrix and `pair_idx` a (P, 2) array of column indices (a, b).
+    Returns (actions, z): actions is +1 for LONG_SPREAD, -1 for
+    SHORT_SPREAD and 0 for no signal, z the latest z-score per pair.
+    """
+    z_threshold = z_threshold if z_threshold is not None else _Z_DEFAULT
+    rolling_window = int(rolling_window if rolling_window is not None else _W_DEFAULT)
+    kalman_cov = kalman_cov if kalman_cov is not None else _K_DEFAULT
+
+    prices = np.asarray(prices, dtype=np.float64)
+    pair_idx = np.asarray(pair_idx, dtype=np.intp).reshape(-1, 2)
+    spreads = prices[:, pair_idx[:, 0]] - prices[:, pair_idx[:, 1]]
+    smoothed = _kalman_columns(spreads, float(kalman_cov))
+
+    z = np.full(pair_idx.shape[0], np.nan)
+    if rolling_window >= 2 and smoothed.shape[0] >= rolling_window:
+        tail = smoothed[-rolling_window:]
+        varying = tail.min(axis=0) != tail.max(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z[varying] = ((tail[-1] - tail.mean(axis=0)) / tail.std(axis=0, ddof=1))[varying]
+
+    actions = np.zeros(pair_idx.shape[0], dtype=np.int8)
+    actions[z < -z_threshold] = 1
+    actions[z > z_threshold] = -1
+    return actions, z
@@ -1,6 +1,16 @@
+from dataclasses import dataclass
+
 DEFAULT_HYPERPARAMS = {
     "z_threshold": 1.5,
     "lookback_days": 180,
     "rolling_window": 60,
     "kalman_cov": 0.001
 }
+
+@dataclass(slots=True, frozen=True)
+class HP:
+    """Hyperparameters for a single backtest run."""
+    z_threshold: float
+    lookback_days: int
+    rolling_window: int
+    kalman_cov: float
\ No newline at end of file
@@ -67,18 +67,20 @@ def check_stop_or_target(z_series, entry_side, stop_z=3.0, target_z=1.0):
     - 'TARGET' if target hit
     - None if neither triggered yet
     """
-    for z in z_series:
-        if entry_side == "LONG_SPREAD":
-            if z > stop_z:
-                return "STOP"
-            if z < target_z:
-                return "TARGET"
-        elif entry_side == "SHORT_SPREAD":
-            if z < -stop_z:
-                return "STOP"
-            if z > -target_z:
-                return "TARGET"
-    return None
+    z = np.asarray(z_series, dtype=np.float64)
+    if entry_side == "LONG_SPREAD":
+        stop_mask, target_mask = z > stop_z, z < target_z
+    elif entry_side == "SHORT_SPREAD":
+        stop_mask, target_mask = z < -stop_z, z > -target_z
+    else:
+        return None
+
+    # First bar where either fires; the stop wins if both fire on the same bar.
+    stop_at = np.argmax(stop_mask) if stop_mask.any() else len(z)
+    target_at = np.argmax(target_mask) if target_mask.any() else len(z)
+    if stop_at == target_at == len(z):
+        return None
+    return "STOP" if stop_at <= target_at else "TARGET"
 
 def test_check_stop_or_target():
     z_long = pd.Series([2.1, 2.5, 3.2])  # should hit STOP
@@ -94,12 +96,12 @@ def test_check_stop_or_target():
 # 4️⃣ Trading Calendar Awareness
 # ===============================
 
-# Example static event dates
-EVENT_DATES = [
+# Example static event dates (a frozenset, so membership checks are O(1))
+EVENT_DATES = frozenset({
     datetime.date(2025, 7, 10),
     datetime.date(2025, 9, 17),
     datetime.date(2025, 12, 12)
-]
+})
 
 def is_event_day(today=None):
     """
@@ -6,6 +6,7 @@ from pathlib import Path
 import optuna
 import mlflow
 from pairsplus.backtest import run_backtest
+from pairsplus.tune_config import HP
 
 MLFLOW_EXPERIMENT = "PairsPlus-Hyperparameter-Tuning"
 BEST_PARAMS_FILE = Path("best_hyperparams.json")
@@ -19,7 +20,7 @@ def objective(trial, enable_mlflow=True):
         "kalman_cov": trial.suggest_float("kalman_cov", 1e-4, 1e-2),
     }
 
-    score = run_backtest(**params)
+    score = run_backtest(HP(**params))
 
     if enable_mlflow:
         with mlflow.start_run():
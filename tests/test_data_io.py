@@ -0,0 +1,93 @@
+import asyncio
+import functools
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from pairsplus import data_io
+
+# 2025-01-02 and 2025-01-03, 14:30 UTC (the New York open)
+TIMESTAMPS = [1735828200, 1735914600]
+
+def _chart(closes, adjclose=None):
+    indicators = {"quote": [{"close": closes}]}
+    if adjclose is not None:
+        indicators["adjclose"] = [{"adjclose": adjclose}]
+    return {"chart": {"error": None, "result": [{
+        "meta": {"exchangeTimezoneName": "America/New_York"},
+        "timestamp": TIMESTAMPS,
+        "indicators": indicators,
+    }]}}
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """
+    Routes data_io's AsyncClient through a MockTransport serving the
+    payloads put in `.charts` by ticker; unknown tickers 404.
+    """
+    stub = SimpleNamespace(charts={}, requests=[])
+
+    def handler(request):
+        stub.requests.append(request)
+        ticker = request.url.path.rsplit("/", 1)[-1]
+        if ticker not in stub.charts:
+            return httpx.Response(404, json={"chart": {"error": "Not Found", "result": None}})
+        return httpx.Response(200, json=stub.charts[ticker])
+
+    client = functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(data_io.httpx, "AsyncClient", client)
+    return stub
+
+def test_fetch_bars_parses_adjusted_closes(yahoo):
+    yahoo.charts["AAPL"] = _chart([10.0, 11.0], adjclose=[9.5, 10.5])
+    yahoo.charts["MSFT"] = _chart([20.0, 21.0], adjclose=[19.5, 20.5])
+
+    df = data_io.fetch_bars(["AAPL", "MSFT"], lookback=5, interval="1d")
+
+    assert list(df.columns) == ["AAPL", "MSFT"]
+    assert list(df.index) == [pd.Timestamp("2025-01-02"), pd.Timestamp("2025-01-03")]
+    np.testing.assert_array_equal(df.to_numpy(), [[9.5, 19.5], [10.5, 20.5]])
+    assert {r.url.params["interval"] for r in yahoo.requests} == {"1d"}
+
+def test_intraday_bars_use_closes_and_keep_timezone(yahoo):
+    yahoo.charts["AAPL"] = _chart([10.0, 11.0])
+
+    df = data_io.fetch_bars(["AAPL"], lookback=5, interval="1h")
+
+    assert str(df.index.tz) == "America/New_York"
+    assert df.index[0] == pd.Timestamp("2025-01-02 09:30", tz="America/New_York")
+    np.testing.assert_array_equal(df["AAPL"].to_numpy(), [10.0, 11.0])
+
+def test_unknown_ticker_is_skipped(yahoo):
+    yahoo.charts["AAPL"] = _chart([10.0, 11.0], adjclose=[10.0, 11.0])
+
+    df = data_io.fetch_bars(["AAPL", "NOPE"], lookback=5)
+
+    assert list(df.columns) == ["AAPL", "NOPE"]
+    assert df["NOPE"].isna().all()
+    assert not df["AAPL"].isna().any()
+
+def test_all_unknown_tickers_raise_a_fetch_error(yahoo):
+    with pytest.raises(data_io.FETCH_ERRORS):
+        data_io.fetch_bars(["NOPE"], lookback=5)
+
+def test_none_closes_become_nan(yahoo):
+    yahoo.charts["AAPL"] = _chart([10.0, None], adjclose=[None, 11.0])
+
+    df = data_io.fetch_bars(["AAPL"], lookback=5)
+
+    assert df["AAPL"].dtype == np.float64
+    assert np.isnan(df["AAPL"].iloc[0]) and df["AAPL"].iloc[1] == 11.0
+
+def test_fetch_bars_inside_a_running_event_loop(yahoo):
+    # The websocket path calls fetch_bars while asyncio is running
+    yahoo.charts["AAPL"] = _chart([10.0, 11.0], adjclose=[10.0, 11.0])
+
+    async def main():
+        return data_io.fetch_bars(["AAPL"], lookback=5)
+
+    df = asyncio.run(main())
+    np.testing.assert_array_equal(df["AAPL"].to_numpy(), [10.0, 11.0])
@@ -0,0 +1,168 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+# execution.py builds its Alpaca clients and reads the order settings on import.
+for name, value in {
+    "ALPACA_KEY": "test-key",
+    "ALPACA_SECRET": "test-secret",
+    "ORDER_TYPE": "MARKET",
+    "PEG_DISTANCE": "0.001",
+    "SPLIT_NOTIONAL": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+from alpaca.common.exceptions import APIError
+from alpaca.trading.enums import OrderSide, OrderStatus
+
+from pairsplus import execution
+
+def _api_error(status):
+    response = SimpleNamespace(status_code=status)
+    return APIError('{"code": 0, "message": "test"}', SimpleNamespace(response=response))
+
+class FakeClient:
+    """
+    Stands in for TradingClient: records submits and cancels, rejects
+    orders for `reject` symbols, and answers get_order_by_id from a
+    per-order list of (status, filled_qty) snapshots, the last repeating.
+    """
+    def __init__(self, reject=(), snapshots=None):
+        self.reject = set(reject)
+        self.snapshots = snapshots or {}
+        self.submitted = []
+        self.cancelled = []
+
+    def submit_order(self, order_data):
+        if order_data.symbol in self.reject:
+            raise _api_error(403)
+        self.submitted.append(order_data)
+        return SimpleNamespace(
+            id=f"order-{len(self.submitted)}", symbol=order_data.symbol, side=order_data.side
+        )
+
+    def cancel_order_by_id(self, order_id):
+        self.cancelled.append(order_id)
+
+    def get_order_by_id(self, order_id):
+        states = self.snapshots.get(order_id, [(OrderStatus.CANCELED, "0")])
+        status, filled = states.pop(0) if len(states) > 1 else states[0]
+        return SimpleNamespace(id=order_id, status=status, filled_qty=filled)
+
+@pytest.fixture
+def messages(monkeypatch):
+    sent = []
+    monkeypatch.setattr(execution, "send_discord_message", sent.append)
+    monkeypatch.setattr(execution, "log_trade_csv", lambda **kwargs: None)
+    monkeypatch.setattr(execution, "get_latest_price", lambda symbol: 100.0)
+    monkeypatch.setattr(execution, "FLATTEN_POLL_SECONDS", 0.0)
+    return sent
+
+def _use(monkeypatch, client):
+    monkeypatch.setattr(execution, "client", client)
+    return client
+
+def test_pair_trade_all_legs_succeed(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient())
+
+    execution.place_pair_trade("AAPL", "MSFT")
+
+    # Legs are submitted concurrently, so compare them unordered
+    assert {(r.symbol, r.side) for r in client.submitted} == {
+        ("AAPL", OrderSide.BUY), ("MSFT", OrderSide.SELL)
+    }
+    assert client.cancelled == []
+    assert messages[-1].startswith("🚀 Executed pair trade")
+
+def test_failed_leg_reverses_the_filled_leg(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient(
+        reject={"MSFT"}, snapshots={"order-1": [(OrderStatus.FILLED, "0.5")]}
+    ))
+
+    execution.place_pair_trade("AAPL", "MSFT")
+
+    assert client.cancelled == ["order-1"]
+    reverse = client.submitted[-1]
+    assert (reverse.symbol, reverse.side, reverse.qty) == ("AAPL", OrderSide.SELL, 0.5)
+    assert messages[-1].startswith("⚠️ Pair trade failed and was unwound")
+
+def test_flatten_waits_for_a_terminal_status(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient(snapshots={"order-1": [
+        (OrderStatus.PENDING_CANCEL, "0.2"),
+        (OrderStatus.PARTIALLY_FILLED, "0.4"),
+        (OrderStatus.CANCELED, "0.5"),
+    ]}))
+    order = execution.place_order(execution.build_order_request("AAPL", OrderSide.BUY, notional=50))
+
+    assert execution.flatten_order(order)
+    assert client.submitted[-1].qty == 0.5
+
+def test_flatten_times_out_while_still_working(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient(
+        snapshots={"order-1": [(OrderStatus.PENDING_CANCEL, "0.2")]}
+    ))
+    monkeypatch.setattr(execution, "FLATTEN_TIMEOUT_SECONDS", 0.0)
+    order = execution.place_order(execution.build_order_request("AAPL", OrderSide.BUY, notional=50))
+
+    assert not execution.flatten_order(order)
+    assert len(client.submitted) == 1
+
+def test_failed_flatten_is_reported(monkeypatch, messages):
+    client = FakeClient(reject={"MSFT"}, snapshots={"order-1": [(OrderStatus.FILLED, "0.5")]})
+    _use(monkeypatch, client)
+    submit = client.submit_order
+
+    def reject_reversal(order_data):
+        if order_data.side == OrderSide.SELL and order_data.symbol == "AAPL":
+            raise _api_error(403)
+        return submit(order_data)
+
+    monkeypatch.setattr(client, "submit_order", reject_reversal)
+
+    execution.place_pair_trade("AAPL", "MSFT")
+
+    assert messages[-1].startswith("❌ Pair trade failed and could not be unwound")
+    assert "AAPL" in messages[-1]
+
+@pytest.mark.parametrize("exc, retry", [
+    (_api_error(429), True),
+    (_api_error(503), True),
+    (_api_error(403), False),
+    (_api_error(422), False),
+    (requests.exceptions.ConnectionError("reset"), True),
+    (requests.exceptions.Timeout("slow"), True),
+    (ValueError("bad qty"), False),
+])
+def test_is_retryable(exc, retry):
+    assert execution._is_retryable(exc) is retry
+
+def test_transient_errors_are_retried(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient())
+    submit = client.submit_order
+    failures = [_api_error(503)]
+
+    def flaky(order_data):
+        if failures:
+            raise failures.pop()
+        return submit(order_data)
+
+    monkeypatch.setattr(client, "submit_order", flaky)
+    monkeypatch.setattr(execution.time, "sleep", lambda seconds: None)
+
+    assert execution.place_order(execution.build_order_request("AAPL", OrderSide.BUY, qty=1))
+    assert len(client.submitted) == 1
+
+def test_failed_bookkeeping_does_not_resubmit(monkeypatch, messages):
+    client = _use(monkeypatch, FakeClient())
+
+    def broken_csv(**kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(execution, "log_trade_csv", broken_csv)
+
+    order = execution.place_order(execution.build_order_request("AAPL", OrderSide.BUY, qty=1))
+
+    assert order is not None
+    assert len(client.submitted) == 1
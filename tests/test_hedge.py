@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from pairsplus.hedge import kalman_hedge_ratio
+
+def _series(seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 10, 200) + rng.normal(0, 0.1, 200)
+    y = 2 * x + 5 + rng.normal(0, 0.1, 200)
+    return y, x
+
+def _matrix_filter(y, x, q=1e-5, r=1e-3):
+    # Textbook Kalman filter for the random-walk state [beta, alpha]
+    mean = np.zeros(2)
+    cov = np.eye(2)
+    for t in range(len(y)):
+        if t > 0:
+            cov = cov + q * np.eye(2)
+        h = np.array([x[t], 1.0])
+        s = h @ cov @ h + r
+        gain = cov @ h / s
+        mean = mean + gain * (y[t] - h @ mean)
+        cov = cov - np.outer(gain, h @ cov)
+    beta, alpha = mean
+    return alpha, beta
+
+def test_kalman_hedge_ratio_matches_matrix_filter():
+    y, x = _series()
+    np.testing.assert_allclose(kalman_hedge_ratio(y, x), _matrix_filter(y, x), rtol=1e-9)
+
+def test_kalman_hedge_ratio_matches_pykalman():
+    pykalman = pytest.importorskip("pykalman")
+    y, x = _series()
+    kf = pykalman.KalmanFilter(
+        transition_matrices=np.eye(2),
+        observation_matrices=np.vstack([x, np.ones_like(x)]).T[:, None, :],
+        transition_covariance=1e-5 * np.eye(2),
+        observation_covariance=1e-3
+    )
+    state_means, _ = kf.filter(np.vstack(y))
+    beta, alpha = state_means[-1]
+    np.testing.assert_allclose(kalman_hedge_ratio(y, x), (alpha, beta), rtol=1e-9)
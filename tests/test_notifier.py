@@ -0,0 +1,93 @@
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from pairsplus import notifier
+
+class StubSession:
+    """
+    Stands in for requests.Session: records each posted content and
+    raises for any post containing `fail_on`.
+    """
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, json, timeout):
+        self.posts.append(json["content"])
+        if self.fail_on and self.fail_on in json["content"]:
+            raise ConnectionError("webhook down")
+        return SimpleNamespace(status_code=204, text="")
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """
+    A fresh queue, worker slot and stub session per test. The long flush
+    window means a batch only closes on MAX_BATCH or shutdown, so the
+    batches don't depend on thread timing.
+    """
+    session = StubSession()
+    shutdowns = []
+    monkeypatch.setattr(notifier.config, "discord_webhook_url", lambda: "https://discord.test/hook")
+    monkeypatch.setattr(notifier, "_queue", queue.Queue(maxsize=1000))
+    monkeypatch.setattr(notifier, "_worker", None)
+    monkeypatch.setattr(notifier, "_session", session)
+    monkeypatch.setattr(notifier, "FLUSH_SECONDS", 30.0)
+    monkeypatch.setattr(notifier.atexit, "register", shutdowns.append)
+    return SimpleNamespace(session=session, shutdowns=shutdowns)
+
+def test_messages_are_batched_in_order(webhook, monkeypatch):
+    monkeypatch.setattr(notifier, "MAX_BATCH", 3)
+
+    for i in range(7):
+        notifier.send_discord_message(f"msg {i}")
+    notifier._shutdown()
+
+    assert webhook.session.posts == ["msg 0\nmsg 1\nmsg 2", "msg 3\nmsg 4\nmsg 5", "msg 6"]
+    assert not notifier._worker.is_alive()
+
+def test_shutdown_is_registered_and_drains_the_queue(webhook):
+    notifier.send_discord_message("first")
+    notifier.send_discord_message("second")
+
+    assert webhook.shutdowns == [notifier._shutdown]
+    webhook.shutdowns[0]()
+
+    assert webhook.session.posts == ["first\nsecond"]
+    assert webhook.session.closed
+
+def test_batches_split_at_the_discord_limit(webhook, monkeypatch):
+    monkeypatch.setattr(notifier, "DISCORD_MAX_CHARS", 11)
+
+    for msg in ["aaaa", "bbbb", "cccc", "dddd"]:
+        notifier.send_discord_message(msg)
+    notifier._shutdown()
+
+    assert webhook.session.posts == ["aaaa\nbbbb", "cccc\ndddd"]
+
+def test_worker_survives_a_failing_post(webhook, monkeypatch):
+    monkeypatch.setattr(notifier, "MAX_BATCH", 2)
+    webhook.session.fail_on = "boom"
+
+    for msg in ["boom", "a", "b", "c"]:
+        notifier.send_discord_message(msg)
+    notifier._shutdown()
+
+    assert webhook.session.posts == ["boom\na", "b\nc"]
+
+def test_no_webhook_skips_the_worker(webhook, monkeypatch):
+    monkeypatch.setattr(notifier.config, "discord_webhook_url", lambda: None)
+
+    notifier.send_discord_message("ignored")
+
+    assert notifier._worker is None
+    assert notifier._queue.empty()
+
+def test_chunks_keep_long_messages_whole(monkeypatch):
+    monkeypatch.setattr(notifier, "DISCORD_MAX_CHARS", 5)
+    assert list(notifier._chunks(["abcdefgh", "ab", "cd", "e"])) == ["abcdefgh", "ab\ncd", "e"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.adfvalues import mackinnonp
+from statsmodels.tsa.stattools import coint
+
+from pairsplus import pairs
+
+def _prices(n_rows=250, seed=0):
+    # Random walks, plus legs built to be cointegrated with some of them
+    rng = np.random.default_rng(seed)
+    walks = 100 + np.cumsum(rng.normal(0, 1, (n_rows, 4)), axis=0)
+    coint_legs = 2 * walks[:, :2] + 5 + rng.normal(0, 1, (n_rows, 2))
+    data = np.column_stack([walks, coint_legs])
+    return pd.DataFrame(data, columns=["A", "B", "C", "D", "E", "F"])
+
+def test_coint_batch_matches_statsmodels():
+    df = _prices()
+    ia, ib = np.triu_indices(df.shape[1], k=1)
+    arr = df.to_numpy()
+
+    stat, pval = pairs._coint_batch(arr[:, ia], arr[:, ib])
+
+    for k, (i, j) in enumerate(zip(ia, ib)):
+        exp_stat, exp_pval, _ = coint(arr[:, i], arr[:, j])
+        np.testing.assert_allclose(stat[k], exp_stat, rtol=1e-6)
+        np.testing.assert_allclose(pval[k], exp_pval, rtol=1e-6, atol=1e-10)
+
+def test_find_cointegrated_matches_statsmodels_with_gaps():
+    df = _prices()
+    df.iloc[10:15, 1] = np.nan
+    df.iloc[40, 4] = np.inf
+    df.iloc[90, 5] = -np.inf
+
+    result = pairs.find_cointegrated(df, max_pairs=100, min_corr=None, n_jobs=1)
+
+    expected = []
+    for a, b in [(a, b) for i, a in enumerate(df.columns) for b in df.columns[i + 1:]]:
+        s1, s2 = pairs.clean_pair_series(df[a], df[b])
+        expected.append((coint(s1, s2)[1], a, b))
+    expected = pd.DataFrame(expected, columns=["pval", "a", "b"])
+
+    got = result.sort_values(["a", "b"]).reset_index(drop=True)
+    want = expected.sort_values(["a", "b"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[["a", "b"]], want[["a", "b"]])
+    np.testing.assert_allclose(got["pval"], want["pval"], rtol=1e-6, atol=1e-10)
+
+def test_mackinnonp_c2_matches_statsmodels():
+    stats = np.concatenate([np.linspace(-30, 5, 351), [-np.inf, np.inf]])
+    expected = [mackinnonp(s, regression="c", N=2) for s in stats]
+    np.testing.assert_allclose(pairs._mackinnonp_c2(stats), expected, rtol=1e-12, atol=1e-15)
+
+def test_find_rolling_cointegrated_matches_per_window_coint():
+    df = _prices(n_rows=130)[["A", "B", "E", "F"]]
+    df.iloc[60, 1] = np.nan
+    window = 100
+
+    result = pairs.find_rolling_cointegrated(df, window=window, max_pairs=10, n_jobs=1)
+
+    expected = []
+    for start in range(len(df) - window + 1):
+        chunk = df.iloc[start:start + window]
+        for i, a in enumerate(chunk.columns):
+            for b in chunk.columns[i + 1:]:
+                s1, s2 = pairs.clean_pair_series(chunk[a], chunk[b])
+                expected.append((coint(s1, s2)[1], a, b, start, start + window))
+    expected = pd.DataFrame(expected, columns=["pval", "a", "b", "start", "end"])
+
+    keys = ["start", "a", "b"]
+    got = result.sort_values(keys).reset_index(drop=True)
+    want = expected.sort_values(keys).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[keys + ["end"]], want[keys + ["end"]])
+    np.testing.assert_allclose(got["pval"], want["pval"], rtol=1e-6, atol=1e-10)
@@ -1,10 +1,13 @@
 import json
+import pytest
 import trade_live
 
 def test_positions_load_and_save(tmp_path):
     # Arrange
     test_file = tmp_path / "positions.json"
+    test_log = tmp_path / "positions.log"
     trade_live.POSITIONS_FILE = test_file
+    trade_live.POSITIONS_LOG = test_log
 
     # Make sure positions is clean
     trade_live.positions = {}
@@ -15,13 +18,69 @@ def test_positions_load_and_save(tmp_path):
         data = json.load(f)
     assert data == {}
 
-    # Add a position and save again
+    # Opening a trade appends to the log instead of rewriting the snapshot
     trade_live.open_trade(("AAPL", "MSFT"), "LONG_SPREAD")
+    with open(test_file) as f:
+        assert json.load(f) == {}
+    with open(test_log) as f:
+        assert [json.loads(line) for line in f] == [["O", "AAPL_MSFT", "LONG_SPREAD"]]
+
+    # Reload positions: snapshot plus replayed log
+    trade_live.load_positions()
+    assert trade_live.positions[("AAPL", "MSFT")] is trade_live.Side.LONG_SPREAD
+    assert trade_live.is_open(("MSFT", "AAPL"))
+
+    # Compaction folds the log into the snapshot
+    trade_live.save_positions()
     with open(test_file) as f:
         data = json.load(f)
-    assert "AAPL_MSFT" in data
     assert data["AAPL_MSFT"] == "LONG_SPREAD"
+    assert test_log.read_text() == ""
+
+    # Closing is logged and replayed too
+    trade_live.close_trade(("AAPL", "MSFT"))
+    trade_live.load_positions()
+    assert ("AAPL", "MSFT") not in trade_live.positions
+
+def test_failed_save_keeps_previous_snapshot(tmp_path, monkeypatch):
+    test_file = tmp_path / "positions.json"
+    test_log = tmp_path / "positions.log"
+    trade_live.POSITIONS_FILE = test_file
+    trade_live.POSITIONS_LOG = test_log
+    trade_live.positions = {("AAPL", "MSFT"): trade_live.Side.LONG_SPREAD}
+    trade_live.save_positions()
+    trade_live.open_trade(("JPM", "BAC"), "SHORT_SPREAD")
+
+    def boom(obj):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(trade_live, "_dumps", boom)
+    with pytest.raises(RuntimeError):
+        trade_live.save_positions()
+
+    # Old snapshot intact, log not truncated, no stray temp file
+    with open(test_file) as f:
+        assert json.load(f) == {"AAPL_MSFT": "LONG_SPREAD"}
+    assert test_log.read_text() != ""
+    assert not (tmp_path / "positions.json.tmp").exists()
+
+
+def test_torn_log_line_is_compacted_away(tmp_path):
+    test_file = tmp_path / "positions.json"
+    test_log = tmp_path / "positions.log"
+    trade_live.POSITIONS_FILE = test_file
+    trade_live.POSITIONS_LOG = test_log
+    trade_live.positions = {}
+    trade_live.save_positions()
+    trade_live.open_trade(("AAPL", "MSFT"), trade_live.Side.LONG_SPREAD)
+    with open(test_log, "a") as f:
+        f.write('["O", "C_D", "LONG')
+
+    trade_live.load_positions()
+    assert test_log.read_text() == ""
 
-    # Reload positions
+    # Ops appended after the torn line survive the next reload
+    trade_live.open_trade(("E", "F"), trade_live.Side.SHORT_SPREAD)
+    trade_live.close_trade(("AAPL", "MSFT"))
     trade_live.load_positions()
-    assert trade_live.positions["AAPL_MSFT"] == "LONG_SPREAD"
\ No newline at end of file
+    assert trade_live.positions == {("E", "F"): trade_live.Side.SHORT_SPREAD}
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pairsplus.signals import (
+    kalman_filter,
+    signal_from_spread,
+    signal_from_spreads,
+    zscore,
+    zscore_and_std,
+)
+
+def _pandas_zscore_std(series, window):
+    rolling = series.rolling(window)
+    std = rolling.std()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (series - rolling.mean()) / std
+    return z, std
+
+def test_zscore():
+    series = pd.Series(range(1, 101))
+    result = zscore(series, rolling_window=20)
+    assert result[:19].isna().all()
+    assert np.isfinite(result[19:]).all()
+
+@pytest.mark.parametrize("window", [2, 5, 20, 60])
+def test_zscore_and_std_match_pandas(window):
+    rng = np.random.default_rng(0)
+    series = pd.Series(100 + rng.normal(0, 1, 2000).cumsum())
+
+    z, std = zscore_and_std(series, window)
+    want_z, want_std = _pandas_zscore_std(series, window)
+
+    np.testing.assert_allclose(std, want_std, rtol=1e-8)
+    np.testing.assert_allclose(z, want_z, rtol=1e-8, atol=1e-10)
+
+@pytest.mark.parametrize("window", [2, 5])
+def test_zscore_and_std_flat_windows(window):
+    # Integer prices keep pandas' rolling sums exact through the flat stretch
+    series = pd.Series([1.0, 3.0, 2.0, 4.0] + [5.0] * 10 + [6.0, 2.0, 7.0], dtype=float)
+
+    z, std = zscore_and_std(series, window)
+    want_z, want_std = _pandas_zscore_std(series, window)
+
+    np.testing.assert_allclose(std, want_std, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(z, want_z, rtol=1e-12, atol=1e-12)
+    assert (std[9:14] == 0).all() and z[9:14].isna().all()
+
+def test_zscore_with_gaps_matches_pandas():
+    series = pd.Series(np.linspace(1, 5, 60) + np.sin(np.arange(60)))
+    series[[10, 33]] = np.nan
+
+    z, std = zscore_and_std(series, 8)
+    want_z, want_std = _pandas_zscore_std(series, 8)
+
+    np.testing.assert_allclose(std, want_std, rtol=1e-10)
+    np.testing.assert_allclose(z, want_z, rtol=1e-10)
+
+def test_kalman_filter():
+    series = pd.Series([10]*50 + [20]*50)
+    smoothed = kalman_filter(series, kalman_cov=0.001)
+    assert len(smoothed) == len(series)
+    assert np.all(np.isfinite(smoothed))
+
+def test_signal_from_spread_short():
+    df = pd.DataFrame({
+        "A": [i * 2 for i in range(100)],
+        "B": list(range(100))
+    })
+    signal = signal_from_spread(
+        df["A"].to_numpy(), df["B"].to_numpy(), "A", "B",
+        z_threshold=0.5,
+        rolling_window=20,
+        kalman_cov=0.001
+    )
+    assert signal is not None
+    assert signal["action"] in {"SHORT_SPREAD", "LONG_SPREAD"}
+    assert isinstance(signal["z"], float)
+
+def test_signal_from_spread_none():
+    df = pd.DataFrame({
+        "A": [10]*100,
+        "B": [10]*100
+    })
+    signal = signal_from_spread(
+        df["A"].to_numpy(), df["B"].to_numpy(), "A", "B",
+        z_threshold=1.5,
+        rolling_window=20,
+        kalman_cov=0.001
+    )
+    assert signal is None
+
+def test_signal_from_spread_uses_the_pandas_zscore():
+    rng = np.random.default_rng(1)
+    a = 100 + rng.normal(0, 1, 300).cumsum()
+    b = 100 + rng.normal(0, 1, 300).cumsum()
+
+    signal = signal_from_spread(a, b, "A", "B", z_threshold=0.0, rolling_window=30, kalman_cov=0.001)
+
+    smoothed = kalman_filter(pd.Series(a - b), kalman_cov=0.001)
+    want_z, _ = _pandas_zscore_std(smoothed, 30)
+    assert np.isclose(signal["z"], want_z.iloc[-1], rtol=1e-8)
+
+def test_signal_from_spreads_matches_single():
+    rng = np.random.default_rng(0)
+    prices = 100 + rng.standard_normal((200, 4)).cumsum(axis=0)
+    prices[:, 3] = 50.0
+    pair_idx = np.array([[0, 1], [1, 2], [2, 0], [3, 3]])
+    actions, z = signal_from_spreads(prices, pair_idx, 0.5, 20, 0.001)
+    codes = {"LONG_SPREAD": 1, "SHORT_SPREAD": -1}
+    for (i, j), action, latest in zip(pair_idx, actions, z):
+        sig = signal_from_spread(prices[:, i], prices[:, j], "A", "B", 0.5, 20, 0.001)
+        assert action == (codes[sig["action"]] if sig else 0)
+        if sig:
+            assert np.isclose(latest, sig["z"])
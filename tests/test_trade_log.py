@@ -0,0 +1,81 @@
+import queue
+
+import pytest
+import trade_live
+
+class StubFile:
+    """
+    Stands in for the trade log file handle, recording each write call.
+    """
+    def __init__(self):
+        self.writes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def flush(self):
+        pass
+
+@pytest.fixture
+def trade_log(monkeypatch, tmp_path):
+    """
+    A fresh queue and worker slot per test, with atexit registrations
+    captured rather than run at interpreter exit. The long idle window
+    means a batch only closes on the byte limit or shutdown.
+    """
+    shutdowns = []
+    monkeypatch.setattr(trade_live, "TRADE_LOG", tmp_path / "trade_log.txt")
+    monkeypatch.setattr(trade_live, "_trade_log_q", queue.Queue(maxsize=10000))
+    monkeypatch.setattr(trade_live, "_trade_log_worker", None)
+    monkeypatch.setattr(trade_live, "TRADE_LOG_IDLE_SECONDS", 30.0)
+    monkeypatch.setattr(trade_live.atexit, "register", shutdowns.append)
+    return shutdowns
+
+def test_trades_are_written_in_order(trade_log):
+    for i in range(20):
+        trade_live.log_trade("ENTRY", ("AAPL", "MSFT"), "LONG_SPREAD", zscore=i)
+    trade_live._stop_trade_log()
+
+    lines = trade_live.TRADE_LOG.read_text().splitlines()
+    assert [line.rsplit("Z: ", 1)[1] for line in lines] == [str(i) for i in range(20)]
+    assert all("| ENTRY | Pair: ('AAPL', 'MSFT') | Side: LONG_SPREAD |" in line for line in lines)
+
+def test_lines_are_batched_by_size(trade_log, monkeypatch):
+    stub = StubFile()
+    monkeypatch.setattr(trade_live, "open", lambda path, mode: stub, raising=False)
+    monkeypatch.setattr(trade_live, "TRADE_LOG_BATCH_BYTES", 25)
+
+    q = trade_live._trade_log_queue()
+    for i in range(5):
+        q.put(f"line {i:04d}\n")
+    trade_live._stop_trade_log()
+
+    # Each line is 10 bytes: a batch closes once it reaches 25
+    assert stub.writes == [
+        "line 0000\nline 0001\nline 0002\n",
+        "line 0003\nline 0004\n",
+    ]
+
+def test_shutdown_is_registered_and_drains_the_queue(trade_log):
+    trade_live.log_trade("EXIT", ("AAPL", "MSFT"), "FLAT")
+
+    assert trade_log == [trade_live._stop_trade_log]
+    trade_log[0]()
+
+    assert not trade_live._trade_log_worker.is_alive()
+    assert "| EXIT |" in trade_live.TRADE_LOG.read_text()
+
+def test_log_appends_to_an_existing_file(trade_log):
+    trade_live.TRADE_LOG.write_text("earlier\n")
+
+    trade_live.log_trade("ENTRY", ("AAPL", "MSFT"), "SHORT_SPREAD")
+    trade_live._stop_trade_log()
+
+    lines = trade_live.TRADE_LOG.read_text().splitlines()
+    assert lines[0] == "earlier" and "SHORT_SPREAD" in lines[1]
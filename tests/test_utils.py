@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pairsplus.utils import check_stop_or_target
+
+def _loop_stop_or_target(z_series, entry_side, stop_z=3.0, target_z=1.0):
+    # The original per-bar loop, kept as the reference semantics
+    for z in z_series:
+        if entry_side == "LONG_SPREAD":
+            if z > stop_z:
+                return "STOP"
+            if z < target_z:
+                return "TARGET"
+        elif entry_side == "SHORT_SPREAD":
+            if z < -stop_z:
+                return "STOP"
+            if z > -target_z:
+                return "TARGET"
+    return None
+
+@pytest.mark.parametrize("z, side, expected", [
+    ([2.1, 2.5, 3.2], "LONG_SPREAD", "STOP"),
+    ([2.1, 0.5, 3.2], "LONG_SPREAD", "TARGET"),
+    ([2.1, 3.5, 0.5], "LONG_SPREAD", "STOP"),
+    ([2.1, 2.2, 2.3], "LONG_SPREAD", None),
+    ([-2.1, -1.8, -0.8], "SHORT_SPREAD", "TARGET"),
+    ([-2.1, -3.5, -0.8], "SHORT_SPREAD", "STOP"),
+    ([np.nan, 2.0, np.nan], "LONG_SPREAD", None),
+    ([], "LONG_SPREAD", None),
+    ([3.5], "FLAT", None),
+])
+def test_first_hit_wins(z, side, expected):
+    assert check_stop_or_target(pd.Series(z, dtype=float), side) == expected
+
+def test_stop_wins_on_the_same_bar():
+    # target_z above stop_z, so a single bar trips both thresholds
+    assert check_stop_or_target([5.0], "LONG_SPREAD", stop_z=3.0, target_z=6.0) == "STOP"
+    assert check_stop_or_target([-5.0], "SHORT_SPREAD", stop_z=3.0, target_z=6.0) == "STOP"
+
+def test_matches_loop_on_random_paths():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        z = rng.normal(0, 3, rng.integers(0, 20))
+        z[rng.random(z.shape) < 0.1] = np.nan
+        side = rng.choice(["LONG_SPREAD", "SHORT_SPREAD"])
+        stop_z, target_z = rng.uniform(0, 5, 2)
+        assert check_stop_or_target(z, side, stop_z, target_z) == \
+            _loop_stop_or_target(z, side, stop_z, target_z)
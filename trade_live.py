@@ -7,20 +7,23 @@ Prometheus metrics server.
 """
 
 import asyncio
+import atexit
+import os
+import queue
+import threading
 import time
-import schedule
-import json
+from enum import IntEnum
 from pathlib import Path
 
 from pairsplus import data_io, pairs, signals, execution
 from pairsplus.notifier import send_discord_message
 from pairsplus.hyperparams import load_best_hyperparameters
 from pairsplus.config import (
-    ALPACA_KEY,
-    ALPACA_SECRET,
-    METRICS_PORT,
-    POLLING_INTERVAL_MINUTES,
-    LIVE_MODE,
+    alpaca_key,
+    alpaca_secret,
+    metrics_port,
+    polling_interval_minutes,
+    live_mode,
     UNIVERSE
 )
 
@@ -30,68 +33,216 @@ from prometheus_client import start_http_server, Counter
 import ssl
 import certifi
 
-try:
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
-    ssl._create_default_https_context = ssl.create_default_context
-except Exception as e:
-    print(f"[SSL Warning] Could not set certifi SSL context: {e}")
-    send_discord_message("⚠️ SSL certificates might not be verified correctly.")
-
 # ----------------- Prometheus Metrics -----------------
 TRADES_PROCESSED = Counter("trades_processed_total", "Number of trade logic cycles run")
 ENTRIES_TOTAL = Counter("trade_entries_total", "Total number of new trades entered")
 EXITS_TOTAL = Counter("trade_exits_total", "Total number of trades exited")
 
-# ----------------- Metrics Server ---------------------
+# ----------------- Startup ----------------------------
+def _bootstrap():
+    """
+    Process-wide setup for a live run: certifi SSL defaults and the
+    metrics server. Called from the CLI entrypoint only, so importing the
+    module (as the tests do) binds no port and sends no webhooks.
+    """
+    try:
+        ssl.create_default_context(cafile=certifi.where())
+        ssl._create_default_https_context = ssl.create_default_context
+    except Exception as e:
+        print(f"[SSL Warning] Could not set certifi SSL context: {e}")
+        send_discord_message("⚠️ SSL certificates might not be verified correctly.")
+
+    try:
+        start_http_server(metrics_port())
+        print(f"[Metrics] Prometheus available at http://localhost:{metrics_port()}/metrics")
+        send_discord_message(f"✅ Metrics server running on port {metrics_port()}")
+    except Exception as e:
+        print(f"[Metrics] Error starting server: {e}")
+        send_discord_message(f"❌ Metrics server error: {e}")
+
+# ----------------- JSON ------------------------------
+# orjson when available (C encoder/decoder, bytes in and out); the stdlib
+# fallback is wrapped to the same bytes interface.
 try:
-    start_http_server(METRICS_PORT)
-    print(f"[Metrics] Prometheus available at http://localhost:{METRICS_PORT}/metrics")
-    send_discord_message(f"✅ Metrics server running on port {METRICS_PORT}")
-except Exception as e:
-    print(f"[Metrics] Error starting server: {e}")
-    send_discord_message(f"❌ Metrics server error: {e}")
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
 
 # ----------------- POSITION TRACKING ------------------
+# positions.json is a snapshot; every open/close since the last snapshot
+# is appended to positions.log as one JSON line, so a mutation costs one
+# small append instead of rewriting the whole file.
 POSITIONS_FILE = Path("positions.json")
+POSITIONS_LOG = Path("positions.log")
+COMPACT_EVERY = 256
+
+class Side(IntEnum):
+    """Open spread direction; values match signal_from_spreads actions."""
+    LONG_SPREAD = 1
+    SHORT_SPREAD = -1
+
+# In memory, positions maps (a, b) tuples to a Side; the "A_B" string keys
+# and side names only exist on disk.
 positions = {}
+_mutations = 0
+# Both orderings of every open pair, so is_open is one set lookup.
+_open_keys = set()
+
+def _pair_from_key(key):
+    a, b = key.split("_", 1)
+    return a, b
+
+def _key_from_pair(pair):
+    return f"{pair[0]}_{pair[1]}"
 
 def load_positions():
-    global positions
+    global positions, _mutations
+    positions = {}
+    _mutations = 0
+    torn = False
     if POSITIONS_FILE.exists():
-        with open(POSITIONS_FILE, "r") as f:
-            positions = json.load(f)
+        with open(POSITIONS_FILE, "rb") as f:
+            positions = {
+                _pair_from_key(k): Side[v] for k, v in _loads(f.read()).items()
+            }
+    if POSITIONS_LOG.exists():
+        with open(POSITIONS_LOG, "rb") as f:
+            for line in f:
+                try:
+                    op = _loads(line)
+                except ValueError:
+                    torn = True  # final line cut off by a crash mid-write
+                    break
+                if op[0] == "O":
+                    positions[_pair_from_key(op[1])] = Side[op[2]]
+                elif op[0] == "C":
+                    positions.pop(_pair_from_key(op[1]), None)
+                _mutations += 1
+    _open_keys.clear()
+    for a, b in positions:
+        _open_keys.update(((a, b), (b, a)))
+    if torn:
+        # Compact now, or the next append would be glued onto the fragment.
+        save_positions()
+    if POSITIONS_FILE.exists() or POSITIONS_LOG.exists():
         print(f"[Positions] Loaded {len(positions)} open positions.")
     else:
-        positions = {}
         print("[Positions] No positions file found. Starting fresh.")
 
 def save_positions():
-    with open(POSITIONS_FILE, "w") as f:
-        json.dump(positions, f, indent=2)
+    """
+    Compact: atomically write the snapshot, then empty the log. Replaying
+    ops already in the snapshot is harmless, so a crash in between is safe;
+    a failed write leaves the previous snapshot and the log untouched.
+    """
+    global _mutations
+    tmp = POSITIONS_FILE.with_name(POSITIONS_FILE.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_dumps({_key_from_pair(p): side.name for p, side in positions.items()}))
+        os.replace(tmp, POSITIONS_FILE)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    open(POSITIONS_LOG, "w").close()
+    _mutations = 0
     print(f"[Positions] Saved {len(positions)} open positions.")
 
-def open_trade(pair, side):
-    positions[f"{pair[0]}_{pair[1]}"] = side
-    save_positions()
+def _log_position_op(op):
+    global _mutations
+    with open(POSITIONS_LOG, "ab") as f:
+        f.write(_dumps(op) + b"\n")
+    _mutations += 1
+    if _mutations >= COMPACT_EVERY:
+        save_positions()
 
-def close_trade(pair):
-    key = f"{pair[0]}_{pair[1]}"
+def pair_keys(pair):
+    """
+    The stored key for `pair` and its reverse, built once so callers in
+    the trading loop can reuse them across the *_key helpers below.
+    """
+    a, b = pair
+    return (a, b), (b, a)
+
+def open_trade_key(key, rev, side):
+    side = Side[side] if isinstance(side, str) else Side(side)
+    positions[key] = side
+    _open_keys.update((key, rev))
+    _log_position_op(["O", _key_from_pair(key), side.name])
+
+def close_trade_key(key, rev):
     if key in positions:
         del positions[key]
-        save_positions()
+        _open_keys.difference_update((key, rev))
+        _log_position_op(["C", _key_from_pair(key)])
+
+def open_trade(pair, side):
+    open_trade_key(*pair_keys(pair), side)
+
+def close_trade(pair):
+    close_trade_key(*pair_keys(pair))
 
 def is_open(pair):
-    return f"{pair[0]}_{pair[1]}" in positions or f"{pair[1]}_{pair[0]}" in positions
+    return tuple(pair) in _open_keys
 
 # ----------------- TRADE LOGGING ---------------------
 TRADE_LOG = Path("trade_log.txt")
+TRADE_LOG_BATCH_BYTES = 1 << 16
+TRADE_LOG_IDLE_SECONDS = 0.2
+# Lines are queued and written by one background thread, up to 64KB per
+# write, once the queue has been quiet for TRADE_LOG_IDLE_SECONDS. A full
+# queue blocks the producer rather than dropping trades.
+_trade_log_q = queue.Queue(maxsize=10000)
+_trade_log_worker = None
+_trade_log_lock = threading.Lock()
+_LOG_STOP = object()
+
+def _drain_trade_log():
+    with open(TRADE_LOG, "a") as fh:
+        stop = False
+        while not stop:
+            lines = [_trade_log_q.get()]
+            size = len(lines[0]) if lines[0] is not _LOG_STOP else 0
+            while lines[-1] is not _LOG_STOP and size < TRADE_LOG_BATCH_BYTES:
+                try:
+                    lines.append(_trade_log_q.get(timeout=TRADE_LOG_IDLE_SECONDS))
+                except queue.Empty:
+                    break
+                if lines[-1] is not _LOG_STOP:
+                    size += len(lines[-1])
+            if lines[-1] is _LOG_STOP:
+                lines.pop()
+                stop = True
+            fh.write("".join(lines))
+            fh.flush()
+
+def _stop_trade_log():
+    _trade_log_q.put(_LOG_STOP)
+    _trade_log_worker.join(timeout=10)
+
+def _trade_log_queue():
+    global _trade_log_worker
+    with _trade_log_lock:
+        if _trade_log_worker is None:
+            _trade_log_worker = threading.Thread(
+                target=_drain_trade_log, name="trade-log", daemon=True
+            )
+            _trade_log_worker.start()
+            atexit.register(_stop_trade_log)
+    return _trade_log_q
 
 def log_trade(event, pair, side, zscore=None):
     log_line = (
         f"{time.strftime('%Y-%m-%d %H:%M:%S')} | {event} | Pair: {pair} | Side: {side} | Z: {zscore}\n"
     )
-    with open(TRADE_LOG, "a") as f:
-        f.write(log_line)
+    _trade_log_queue().put(log_line)
     print(f"[Log] {log_line.strip()}")
 
 # ----------------- Alpaca WebSocket -------------------
@@ -105,12 +256,16 @@ async def run_websocket_live():
     if not StockDataStream:
         raise ImportError("alpaca-py package is required for websocket mode.")
 
-    stream = StockDataStream(ALPACA_KEY, ALPACA_SECRET)
+    stream = StockDataStream(alpaca_key(), alpaca_secret())
+    dirty = set()
+    wake = asyncio.Event()
 
     async def handle_bar(bar):
         print(f"[WebSocket] New bar for {bar.symbol}")
-        await process_live_bar(bar.symbol)
+        dirty.add(bar.symbol)
+        wake.set()
 
+    consumer = asyncio.create_task(process_live_bars(dirty, wake))
     try:
         stream.subscribe_bars(handle_bar, *UNIVERSE)
         print(f"[WebSocket] Subscribed to bars for: {UNIVERSE}")
@@ -122,89 +277,149 @@ async def run_websocket_live():
     except Exception as e:
         print(f"[WebSocket Error] Unexpected error: {e}")
         send_discord_message(f"❌ WebSocket error: {e}")
+    finally:
+        consumer.cancel()
+
+# Bars for the whole universe arrive within moments of each other, so
+# the consumer waits out a short window and runs one cycle per burst.
+BAR_COALESCE_SECONDS = 0.25
+
+async def _run_cycle(loop):
+    """
+    One trading cycle on the default executor. Errors are reported and
+    swallowed so a bad cycle doesn't end the loop driving later ones.
+    """
+    try:
+        await loop.run_in_executor(None, run_trading_logic)
+    except Exception as e:
+        print(f"[Trading Error] Cycle failed: {e}")
+        send_discord_message(f"❌ Trading cycle error: {e}")
 
-async def process_live_bar(symbol):
-    print(f"[WebSocket] Processing new bar for {symbol}")
-    run_trading_logic()
+async def process_live_bars(dirty, wake):
+    # The cycle runs on the default executor so the stream keeps reading
+    # while it computes; bars arriving meanwhile fold into the next cycle.
+    loop = asyncio.get_running_loop()
+    while True:
+        await wake.wait()
+        await asyncio.sleep(BAR_COALESCE_SECONDS)
+        symbols = sorted(dirty)
+        dirty.clear()
+        wake.clear()
+        print(f"[WebSocket] Processing new bars for {symbols}")
+        await _run_cycle(loop)
 
 # ----------------- Core Trading Logic -----------------
+def _best_params():
+    """
+    Tuned hyperparameters, or {} (so the defaults below apply) when no
+    tuning run has written best_hyperparams.json yet. The loader itself
+    only re-parses the file when its mtime changes.
+    """
+    try:
+        return load_best_hyperparameters()
+    except FileNotFoundError:
+        return {}
+
+# A fresh fetch that hasn't gained a new bar keeps the pairs from the
+# last cointegration run.
+_coint_cache = {"key": None, "pairs": None}
+
+def _cointegrated_pairs(df, lookback_days):
+    coint_key = (lookback_days, df.index[-1], tuple(df.columns)) if len(df) else None
+    if coint_key is not None and _coint_cache["key"] == coint_key:
+        return _coint_cache["pairs"]
+    best_pairs = pairs.find_cointegrated(df, max_pairs=5)
+    _coint_cache.update(key=coint_key, pairs=best_pairs)
+    return best_pairs
+
 def run_trading_logic():
     print("[Trading] Fetching bars and computing signals...")
-    try:
-        best_params = load_best_hyperparameters()
-        lookback_days = best_params.get("lookback_days", 90)
-        rolling_window = best_params.get("rolling_window", 60)
-        z_threshold = best_params.get("z_threshold", 1.5)
-        kalman_cov = best_params.get("kalman_cov", 0.005)
+    best_params = _best_params()
+    lookback_days = best_params.get("lookback_days", 90)
+    rolling_window = best_params.get("rolling_window", 60)
+    z_threshold = best_params.get("z_threshold", 1.5)
+    kalman_cov = best_params.get("kalman_cov", 0.005)
 
+    try:
         df = data_io.fetch_bars(interval="1h", lookback=lookback_days)
-    except Exception as e:
+    except data_io.FETCH_ERRORS as e:
         print(f"[Error] Failed to fetch bars: {e}")
         send_discord_message(f"❌ Error fetching bars: {e}")
         return
 
-    best_pairs = pairs.find_cointegrated(df, max_pairs=5)
+    # Outside the try: a pair-selection error is not a fetch failure, and
+    # _run_cycle reports it as a cycle error instead.
+    best_pairs = _cointegrated_pairs(df, lookback_days)
+
     TRADES_PROCESSED.inc()
 
-    for _, row in best_pairs.iterrows():
-        a, b = row["a"], row["b"]
-        spread_df = df[[a, b]]
-        sig = signals.signal_from_spread(
-            spread_df, a, b,
-            z_threshold=z_threshold,
-            rolling_window=rolling_window,
-            kalman_cov=kalman_cov
-        )
-
-        pair_key = (a, b)
-
-        if sig:
-            if not is_open(pair_key):
-                if sig["action"] == "LONG_SPREAD":
+    # One batched signal pass over the price matrix for every pair.
+    col_idx = {c: i for i, c in enumerate(df.columns)}
+    pair_list = list(zip(best_pairs["a"].to_numpy(), best_pairs["b"].to_numpy()))
+    actions, zs = signals.signal_from_spreads(
+        df.to_numpy(dtype=float),
+        [(col_idx[a], col_idx[b]) for a, b in pair_list],
+        z_threshold=z_threshold,
+        rolling_window=rolling_window,
+        kalman_cov=kalman_cov
+    )
+
+    for (a, b), action, z in zip(pair_list, actions, zs):
+        key, rev = pair_keys((a, b))
+
+        if action:
+            if key not in _open_keys:
+                if action == Side.LONG_SPREAD:
                     print(f"🚀 Opening LONG_SPREAD: {a} - {b}")
                     execution.place_pair_trade(a, b)
-                    open_trade(pair_key, "LONG_SPREAD")
-                    log_trade("ENTRY", pair_key, "LONG_SPREAD", sig["z"])
+                    open_trade_key(key, rev, Side.LONG_SPREAD)
+                    log_trade("ENTRY", key, "LONG_SPREAD", z)
                     ENTRIES_TOTAL.inc()
-                    send_discord_message(f"🚀 ENTRY: LONG_SPREAD {a} - {b} | Z: {sig['z']:.2f}")
-                elif sig["action"] == "SHORT_SPREAD":
+                    send_discord_message(f"🚀 ENTRY: LONG_SPREAD {a} - {b} | Z: {z:.2f}")
+                elif action == Side.SHORT_SPREAD:
                     print(f"🚀 Opening SHORT_SPREAD: {b} - {a}")
                     execution.place_pair_trade(b, a)
-                    open_trade(pair_key, "SHORT_SPREAD")
-                    log_trade("ENTRY", pair_key, "SHORT_SPREAD", sig["z"])
+                    open_trade_key(key, rev, Side.SHORT_SPREAD)
+                    log_trade("ENTRY", key, "SHORT_SPREAD", z)
                     ENTRIES_TOTAL.inc()
-                    send_discord_message(f"🚀 ENTRY: SHORT_SPREAD {b} - {a} | Z: {sig['z']:.2f}")
+                    send_discord_message(f"🚀 ENTRY: SHORT_SPREAD {b} - {a} | Z: {z:.2f}")
             else:
-                print(f"✅ Position already open for {pair_key}. Skipping entry.")
+                print(f"✅ Position already open for {key}. Skipping entry.")
         else:
-            if is_open(pair_key):
-                print(f"⚡ Spread mean-reverted. Exiting {pair_key}")
-                close_trade(pair_key)
-                log_trade("EXIT", pair_key, "CLOSE")
+            if key in _open_keys:
+                print(f"⚡ Spread mean-reverted. Exiting {key}")
+                close_trade_key(key, rev)
+                log_trade("EXIT", key, "CLOSE")
                 EXITS_TOTAL.inc()
-                send_discord_message(f"⚡ EXIT: Closed position for pair {pair_key}")
+                send_discord_message(f"⚡ EXIT: Closed position for pair {key}")
 
 # ----------------- Polling Mode Loop -----------------
-def schedule_polling_loop():
-    load_positions()
+async def run_polling_live():
     send_discord_message("🟢 Polling trading mode started.")
 
-    def job():
-        print("[Polling] Running trading job...")
-        run_trading_logic()
-
-    schedule.every(POLLING_INTERVAL_MINUTES).minutes.do(job)
-
-    print(f"[Polling] Starting schedule loop every {POLLING_INTERVAL_MINUTES} minutes.")
+    interval = polling_interval_minutes() * 60
+    print(f"[Polling] Starting schedule loop every {polling_interval_minutes()} minutes.")
+    # Targets advance by whole intervals from the start, so a slow cycle
+    # doesn't push every later run back by its duration. Cycles run on the
+    # default executor, as in websocket mode.
+    loop = asyncio.get_running_loop()
+    next_run = loop.time() + interval
     while True:
-        schedule.run_pending()
-        time.sleep(30)
+        await asyncio.sleep(max(0.0, next_run - loop.time()))
+        print("[Polling] Running trading job...")
+        await _run_cycle(loop)
+        next_run += interval
 
 # ----------------- CLI Entrypoint --------------------
+async def main():
+    if live_mode() == "polling":
+        await run_polling_live()
+    else:
+        await run_websocket_live()
+
 if __name__ == "__main__":
-    send_discord_message(f"🤖 Bot starting in {LIVE_MODE.upper()} mode.")
+    _bootstrap()
+    send_discord_message(f"🤖 Bot starting in {live_mode().upper()} mode.")
     load_positions()
-    if LIVE_MODE == "polling":
-        schedule_polling_loop()
-    else:
-        asyncio.run(run_websocket_live())
\ No newline at end of file
+    atexit.register(save_positions)
+    asyncio.run(main())
\ No newline at end of file